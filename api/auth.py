@@ -1,21 +1,31 @@
-from passlib.context import CryptContext
 from jose import jwt 
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 
+from services.password_hasher import PasswordHasher
+
 load_dotenv()
 
-    SECRET_KEY = os.getenv("JWT_SECRET")
-    ALGORITHM = "HS256"
+SECRET_KEY = os.getenv("JWT_SECRET")
+ALGORITHM = "HS256"
 
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# same bounded argon2 executor and settings as api/main.py
+hasher = PasswordHasher(
+    workers=int(os.getenv("HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("HASH_MAX_QUEUE", "32")),
+    executor=os.getenv("HASH_EXECUTOR", "thread"),
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "4"))
+)
 
 def hash_password(password:str):
-    return pwd_context.hash(password)
+    return hasher.hash(password)
 
 def verify_password(password, hashed):
-    return pwd_context.verify(password, hashed)
+    ok, _ = hasher.verify_and_update(password, hashed)
+    return ok
 
 def create_token(data:dict):
     to_encode = data.copy()
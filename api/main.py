@@ -1,19 +1,39 @@
 import os
-import psycopg2
+import threading
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 import requests
-from datetime import datetime, timedelta, date
-from fastapi import FastAPI
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # NEW IMPORTS
 from jose import jwt
-from passlib.context import CryptContext
 from apscheduler.schedulers.background import BackgroundScheduler
-import smtplib
-from email.mime.text import MIMEText
-from twilio.rest import Client
+
+from api.migrations import migrate
+from api.services.db_pool import DBPool, execute_prepared
+from api.services.async_clients import AsyncDB, AsyncHTTP
+from api.services.spatial_index import get_spatial_index, refresh_spatial_index
+from api.services.ranking_engine import (
+    get_ranking_engine, refresh_ranking_engine, hybrid_score_sql,
+    get_embedding_models, refresh_embedding_models, same_embedding_space
+)
+from api.services.blood_types import BLOOD_COLUMNS, COMPATIBLE_DONORS, to_blood_type
+from api.services.embedding_cache import EmbeddingCache, WARMUP_PHRASES, normalize
+from api.services.embedders import build_embedder
+from api.services.metrics import Metrics
+from api.services.profiling import RequestProfiler
+from api.services.explanation_cache import (
+    ExplanationCache, InflightExplanations, AsyncInflightExplanations
+)
+from api.services.notifications import Outbox, build_providers, enqueue
+from api.services.password_hasher import PasswordHasher, HasherBusy
 
 load_dotenv()
 
@@ -37,24 +57,116 @@ DB = {
     "port": int(os.getenv("DB_PORT")),
 }
 
+# per-stage latency histograms served at /metrics; METRICS_ENABLED=0 turns
+# every timer into a no-op
+metrics = Metrics(enabled=os.getenv("METRICS_ENABLED", "1") == "1")
+
+# send "X-Profile: <PROFILE_TOKEN>" to run /recommend under cProfile;
+# unset PROFILE_TOKEN disables it
+profiler = RequestProfiler(
+    token=os.getenv("PROFILE_TOKEN"),
+    directory=os.getenv("PROFILE_DIR", "profiles")
+)
+
+def profile_token(request):
+    # header only: a query string ends up in access logs and browser history
+    return request.headers.get("x-profile")
+
+async def profile_requests(request: Request, call_next):
+    if not profiler.authorized(profile_token(request)):
+        return await call_next(request)
+
+    holder = {}
+    reset = profiler.activate(holder)
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.deactivate(reset)
+
+    if "id" in holder:
+        response.headers["X-Profile-Id"] = holder["id"]
+    return response
+
+# without a token every request would pay for the check, so skip the middleware
+if profiler.enabled:
+    app.middleware("http")(profile_requests)
+
+db_pool = DBPool(
+    DB,
+    minconn=int(os.getenv("DB_POOL_MIN", "1")),
+    maxconn=int(os.getenv("DB_POOL_MAX", "10")),
+    metrics=metrics
+)
+
+# radius used when a search comes in without a city
+DEFAULT_RADIUS_KM = float(os.getenv("SEARCH_RADIUS_KM", "10"))
+# upper bounds on SearchRequest.radius_km and .nearest; past a few tens of
+# km the candidate list stops being a city's worth of hospitals
+MAX_RADIUS_KM = float(os.getenv("SEARCH_MAX_RADIUS_KM", "50"))
+MAX_NEAREST = int(os.getenv("SEARCH_MAX_NEAREST", "500"))
+# searches per /recommend/batch call; each one adds candidates to one statement
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+
+# where the hybrid score is computed: "sql" in Postgres, "numpy" in process
+# (city searches only); both rank by the same formula
+RANKING_ENGINE = os.getenv("RANKING_ENGINE", "sql")
+
 EMBED_MODEL = os.getenv("OLLAMA_MODEL")
 EXPLAIN_MODEL = os.getenv("EXPLAIN_MODEL")
 
 OLLAMA_EMBED_URL = "http://localhost:11434/api/embeddings"
 OLLAMA_CHAT_URL = "http://localhost:11434/api/generate"
 
+embed_cache = EmbeddingCache(
+    path=os.getenv("EMBED_CACHE_PATH", "embed_cache.sqlite3"),
+    max_entries=int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+)
+
+# EMBED_BACKEND=fallback answers from a local hashing embedder when Ollama
+# misses EMBED_FALLBACK_TIMEOUT; those vectors are never cached, and searches
+# using them rank without the vector term (see in_hospital_space)
+embedder = build_embedder(
+    os.getenv("EMBED_BACKEND", "ollama"),
+    url=OLLAMA_EMBED_URL,
+    model=EMBED_MODEL,
+    dim=int(os.getenv("EMBED_DIM", "768")),
+    timeout=float(os.getenv("EMBED_FALLBACK_TIMEOUT", "2")),
+    workers=int(os.getenv("EMBED_WORKERS", "8"))
+)
+
+# whole-response budget for explanations; late ones fall back to a template
+EXPLAIN_DEADLINE = float(os.getenv("EXPLAIN_DEADLINE_SECONDS", "8"))
+# explanation jobs started by a profiled request are profiled in the worker too
+explain_pool = profiler.pool(ThreadPoolExecutor(max_workers=int(os.getenv("EXPLAIN_WORKERS", "8"))))
+
+explain_cache = ExplanationCache(
+    ttl_seconds=int(os.getenv("EXPLAIN_CACHE_TTL", str(6 * 3600))),
+    max_entries=int(os.getenv("EXPLAIN_CACHE_SIZE", "4096"))
+)
+
 # ---------------- AUTH CONFIG ----------------
 SECRET_KEY = os.getenv("JWT_SECRET", "supersecret")
 ALGORITHM = "HS256"
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
-def hash_password(password):
-    password = password.encode("utf-8")[:72]
-    return pwd_context.hash(password)
+# argon2 runs on its own capped executor that /login and /register await, so
+# a login burst gets 503s and never holds request threads from /recommend. Changing the ARGON2_* values
+# upgrades stored hashes the next time each user logs in.
+hasher = PasswordHasher(
+    workers=int(os.getenv("HASH_WORKERS", "2")),
+    max_queue=int(os.getenv("HASH_MAX_QUEUE", "32")),
+    executor=os.getenv("HASH_EXECUTOR", "thread"),
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "3")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "4"))
+)
 
-def verify_password(password, hashed):
-    password = password.encode("utf-8")[:72]
-    return pwd_context.verify(password, hashed)
+async def shed_hashing_async(fn, *args):
+    try:
+        with metrics.timer("password_hash"):
+            return await fn(*args)
+    except HasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly",
+                            headers={"Retry-After": "1"})
 
 def create_token(data):
     to_encode = data.copy()
@@ -62,39 +174,35 @@ def create_token(data):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# ---------------- EMAIL ----------------
-def send_email(to_email, message):
-    msg = MIMEText(message)
-    msg["Subject"] = "ThalCare Reminder"
-    msg["From"] = os.getenv("EMAIL_ADDRESS")
-    msg["To"] = to_email
-
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(os.getenv("EMAIL_ADDRESS"), os.getenv("EMAIL_PASSWORD"))
-    server.send_message(msg)
-    server.quit()
-
-# ---------------- SMS ----------------
-twilio_client = Client(
-    os.getenv("TWILIO_SID"),
-    os.getenv("TWILIO_AUTH_TOKEN")
+# ---------------- NOTIFICATIONS ----------------
+# reminders go through a Postgres outbox; workers send them with per-channel
+# rate limits, retries with backoff, and a dead-letter state
+outbox = Outbox(
+    db_pool.connection,
+    build_providers(os.getenv("NOTIFY_BACKEND", "live")),
+    rate_limits={
+        "email": float(os.getenv("EMAIL_RATE_PER_SEC", "5")),
+        "sms": float(os.getenv("SMS_RATE_PER_SEC", "1")),
+    },
+    workers=int(os.getenv("NOTIFY_WORKERS", "4")),
+    max_attempts=int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5")),
+    base_delay=float(os.getenv("NOTIFY_RETRY_BASE_SECONDS", "30")),
+    metrics=metrics,
 )
 
-def send_sms(phone, message):
-    twilio_client.messages.create(
-        body=message,
-        from_=os.getenv("TWILIO_PHONE"),
-        to=phone
-    )
-
 # ---------------- SCHEMAS ----------------
 class SearchRequest(BaseModel):
-    city: str
+    city: str = None  # omit to search across cities by radius
     blood_type: str
     query: str
     user_lat: float
     user_lon: float
+    compatible: bool = False  # also match donor types the recipient can receive
+    # ignore city tags, search this far around the user
+    radius_km: float = Field(None, gt=0, le=MAX_RADIUS_KM)
+    # ignore city tags, rank only the k hospitals closest to the user
+    # (within radius_km if that is set too)
+    nearest: int = Field(None, ge=1, le=MAX_NEAREST)
 
 class FeedbackRequest(BaseModel):
     hospital: str
@@ -119,17 +227,52 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
-# ---------------- OLLAMA EMBED ----------------
+class BatchSearchRequest(BaseModel):
+    requests: list[SearchRequest] = Field(..., max_length=BATCH_MAX_ITEMS)
+    explain: bool = True
+
+# ---------------- EMBED ----------------
 def embed(text):
-    r = requests.post(OLLAMA_EMBED_URL, json={
-        "model": EMBED_MODEL,
-        "prompt": text
-    }, timeout=60)
-    return r.json()["embedding"]
+    return embed_many([text])[0]
+
+def cache_embeddings(texts, vectors, model):
+    # only the configured model's vectors are cached; fallback ones are not
+    if model != embedder.model:
+        return vectors
+    return [embed_cache.put(model, t, v) for t, v in zip(texts, vectors)]
+
+def in_hospital_space(vector, model):
+    # a query vector from another model (a fallback answer) is None, and every
+    # ranking path then scores on distance, response time and rating only
+    if same_embedding_space(model, get_embedding_models(db_pool.connection)):
+        return vector
+    return None
+
+def embed_many(texts):
+    # cache first; the misses go to the embedder as one batch
+    vectors = {}
+    misses = {}
+    for t in texts:
+        key = normalize(t)
+        if key in vectors or key in misses:
+            continue
+        vec = embed_cache.get(embedder.model, t)
+        if vec is None:
+            misses[key] = t
+        else:
+            vectors[key] = in_hospital_space(vec, embedder.model)
+
+    if misses:
+        with metrics.timer("embed"):
+            computed, model = embedder.embed_tagged(list(misses.values()))
+        computed = cache_embeddings(misses.values(), computed, model)
+        vectors.update((k, in_hospital_space(v, model)) for k, v in zip(misses, computed))
+
+    return [vectors[normalize(t)] for t in texts]
 
 # ---------------- EXPLAIN ----------------
-def explain(hospital):
-    prompt = f"""
+def explain_prompt(hospital):
+    return f"""
 Explain simply why this hospital is recommended in an emergency:
 
 Hospital: {hospital['name']}
@@ -141,163 +284,318 @@ Blood units available: {hospital['blood']}
 
 Give a short human friendly explanation.
 """
-    r = requests.post(OLLAMA_CHAT_URL, json={
-        "model": EXPLAIN_MODEL,
-        "prompt": prompt,
-        "stream": False
-    }, timeout=60)
 
-    return r.json()["response"]
+def generate_explanation(hospital):
+    with metrics.timer("explain"):
+        r = requests.post(OLLAMA_CHAT_URL, json={
+            "model": EXPLAIN_MODEL,
+            "prompt": explain_prompt(hospital),
+            "stream": False
+        }, timeout=60)
+
+        return r.json()["response"]
+
+# queued or running LLM calls; past EXPLAIN_MAX_PENDING a response gets templates
+EXPLAIN_MAX_PENDING = int(os.getenv("EXPLAIN_MAX_PENDING", "32"))
+explain_jobs = InflightExplanations(
+    explain_pool, generate_explanation, explain_cache, max_pending=EXPLAIN_MAX_PENDING
+)
+
+def template_explanation(hospital):
+    # fields the hospital has no value for are left out
+    facts = [f"has {hospital['blood']} units of the requested blood type"]
+    if hospital["icu"] is not None:
+        facts.append(f"{hospital['icu']} ICU beds available")
+    if hospital["rating"] is not None:
+        facts.append(f"a rating of {hospital['rating']}")
+    if hospital["response"] is not None:
+        facts.append(f"an average response time of {hospital['response']} minutes")
+    listed = ", ".join(facts[:-1]) + " and " + facts[-1] if len(facts) > 1 else facts[0]
+    return f"{hospital['name']} is {hospital['distance']} km away, {listed}."
+
+def iter_explanations(hospitals, deadline=EXPLAIN_DEADLINE):
+    # yields (index, explanation) as each one completes; all run in parallel
+    # against one shared deadline. Jobs are shared with concurrent requests
+    # for the same hospital; one nobody waits for any more is cancelled if
+    # still queued, and a full queue means a template straight away.
+    futures = {}
+    claimed = []
+    pending = set(range(len(hospitals)))
+
+    try:
+        for i, h in enumerate(hospitals):
+            f = explain_jobs.claim(h)
+            if f is None:
+                continue
+            claimed.append((h, f))
+            futures.setdefault(f, []).append(i)
+
+        try:
+            for f in as_completed(futures, timeout=deadline):
+                ok = not f.cancelled() and f.exception() is None
+                for i in futures[f]:
+                    pending.discard(i)
+                    yield i, f.result() if ok else template_explanation(hospitals[i])
+        except FuturesTimeout:
+            pass
+
+        for i in sorted(pending):
+            yield i, template_explanation(hospitals[i])
+
+    finally:
+        # also runs when an SSE client disconnects mid-stream
+        for h, f in claimed:
+            explain_jobs.release(h, f)
+
+def explain_all(hospitals, deadline=EXPLAIN_DEADLINE):
+    explanations = [None] * len(hospitals)
+    for i, text in iter_explanations(hospitals, deadline):
+        explanations[i] = text
+    return explanations
 
 # ---------------- HYBRID SEARCH ----------------
-def hybrid_search(city, blood_col, user_query, user_lat, user_lon):
+def check_blood_col(blood_col):
+    # column names end up in SQL and statement names, so only known ones pass
+    if blood_col not in BLOOD_COLUMNS:
+        raise HTTPException(status_code=422, detail=f"Unknown blood type: {blood_col}")
 
-    conn = psycopg2.connect(**DB)
-    cur = conn.cursor()
+def hybrid_candidates(city, blood_col, user_lat, user_lon, radius_km=None, nearest=None):
 
-    q_emb = embed(user_query)
+    check_blood_col(blood_col)
 
-    sql = f"""
-    SELECT
-        name,
-        rating,
-        avg_response_time_mins,
-        icu_beds_available,
-        {blood_col},
-        6371 * acos(
-            cos(radians(%s)) * cos(radians(lat)) *
-            cos(radians(lon) - radians(%s)) +
-            sin(radians(%s)) * sin(radians(lat))
-        ) AS distance_km
-    FROM hospitals
-    WHERE city = %s
-      AND {blood_col} > 0
-    LIMIT 5;
-    """
+    # distances come from the in-memory grid index, SQL only sees candidate ids
+    index = get_spatial_index(db_pool.connection)
+
+    # k-nearest mode walks grid rings outward until the k-th hit is settled
+    if nearest is not None:
+        nearby = index.nearest(user_lat, user_lon, nearest)
+        if radius_km is not None:
+            nearby = [n for n in nearby if n[1] <= radius_km]
+        return [n[0] for n in nearby], [n[1] for n in nearby]
+
+    # radius mode ignores city tags, so hospitals just over a boundary still
+    # show up; the grid only visits cells overlapping the bounding box
+    if radius_km is not None or not city:
+        nearby = index.within(user_lat, user_lon, radius_km or DEFAULT_RADIUS_KM)
+        return [n[0] for n in nearby], [n[1] for n in nearby]
 
-    cur.execute(sql, (user_lat, user_lon, user_lat, city))
-    rows = cur.fetchall()
+    ids, dists = index.distances(user_lat, user_lon, city)
+    return ids, dists.tolist()
 
-    cur.close()
-    conn.close()
+def hybrid_sql(blood_col):
+    return f"""
+    SELECT
+        h.name,
+        h.rating,
+        h.avg_response_time_mins,
+        h.icu_beds_available,
+        h.{blood_col},
+        c.distance_km,
+        h.id
+    FROM hospitals h
+    JOIN unnest($1::text[], $2::float8[]) AS c(id, distance_km)
+      ON h.id::text = c.id
+    WHERE h.{blood_col} > 0
+    ORDER BY {hybrid_score_sql("$3::float8[]::vector", "c.distance_km")}, c.distance_km
+    LIMIT 5
+    """
 
+def hospitals_from_rows(rows):
     hospitals = []
     for r in rows:
         hospitals.append({
             "name": r[0],
-            "rating": float(r[1]),
+            "rating": float(r[1]) if r[1] is not None else None,
             "response": r[2],
             "icu": r[3],
             "blood": r[4],
-            "distance": round(r[5], 2)
+            "distance": round(r[5], 2),
+            "id": str(r[6])
         })
-
     return hospitals
 
-# ---------------- REGISTER ----------------
-@app.post("/register")
-def register(req: RegisterRequest):
-
-    conn = psycopg2.connect(**DB)
-    cur = conn.cursor()
-
-    # Create tables if not exist
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id SERIAL PRIMARY KEY,
-        email TEXT UNIQUE,
-        password_hash TEXT,
-        phone TEXT,
-        role TEXT
-    );
-    """)
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS thalassemia_profiles (
-        id SERIAL PRIMARY KEY,
-        user_id INTEGER REFERENCES users(id),
-        full_name TEXT,
-        age INTEGER,
-        blood_group TEXT,
-        last_transfusion DATE,
-        interval_days INTEGER,
-        next_due_date DATE,
-        city TEXT
-    );
-    """)
+# hospitals holding any type the recipient can receive, most compatible units first
+COMPATIBLE_SQL = """
+    SELECT
+        h.name,
+        h.rating,
+        h.avg_response_time_mins,
+        h.icu_beds_available,
+        SUM(i.units) AS compatible_units,
+        c.distance_km,
+        h.id
+    FROM unnest($1::text[], $2::float8[]) AS c(id, distance_km)
+    JOIN blood_inventory i
+      ON i.hospital_id = c.id AND i.units > 0
+    JOIN blood_compatibility bc
+      ON bc.donor = i.blood_type AND bc.recipient = $3
+    JOIN hospitals h
+      ON h.id::text = c.id
+    GROUP BY h.id, c.distance_km
+    ORDER BY compatible_units DESC, c.distance_km
+    LIMIT 5
+    """
 
-    try:
-        cur.execute("""
-        INSERT INTO users (email, password_hash, phone, role)
-        VALUES (%s, %s, %s, %s)
-        RETURNING id;
-        """, (
-            req.email,
-            hash_password(req.password),
-            req.phone,
-            req.role
-        ))
+def compatible_search(city, blood_col, user_lat, user_lon, radius_km=None, nearest=None):
+
+    ids, dists = hybrid_candidates(city, blood_col, user_lat, user_lon, radius_km, nearest)
+    if not ids:
+        return []
+
+    with db_pool.connection() as conn, metrics.timer("db_execute"):
+        cur = execute_prepared(
+            conn, "hybrid_compatible", COMPATIBLE_SQL,
+            ["text[]", "float8[]", "text"],
+            (ids, dists, to_blood_type(blood_col))
+        )
+        rows = cur.fetchall()
+        cur.close()
 
-        user_id = cur.fetchone()[0]
+    return hospitals_from_rows(rows)
 
-        if req.role == "thalassemia":
-            last_date = datetime.strptime(req.last_transfusion, "%Y-%m-%d").date()
-            next_due = last_date + timedelta(days=req.interval_days)
+def use_ranking_engine(city, radius_km, nearest=None):
+    # the NumPy engine is partitioned by city; radius and k-nearest searches stay on SQL
+    return RANKING_ENGINE == "numpy" and bool(city) and radius_km is None and nearest is None
 
+def rank_in_memory(city, blood_col, q_emb, user_lat, user_lon):
+    check_blood_col(blood_col)
+    engine = get_ranking_engine(db_pool.connection)
+    with metrics.timer("rank"):
+        rows = engine.rank(city, blood_col, q_emb, user_lat, user_lon)
+    return hospitals_from_rows(rows)
+
+def hybrid_search(city, blood_col, user_query, user_lat, user_lon, compatible=False,
+                  radius_km=None, nearest=None):
+
+    if compatible:
+        return compatible_search(city, blood_col, user_lat, user_lon, radius_km, nearest)
+
+    if use_ranking_engine(city, radius_km, nearest):
+        return rank_in_memory(city, blood_col, embed(user_query), user_lat, user_lon)
+
+    ids, dists = hybrid_candidates(city, blood_col, user_lat, user_lon, radius_km, nearest)
+    if not ids:
+        return []
+
+    q_emb = embed(user_query)
+
+    with db_pool.connection() as conn, metrics.timer("db_execute"):
+        cur = execute_prepared(
+            conn, f"hybrid_{blood_col}", hybrid_sql(blood_col),
+            ["text[]", "float8[]", "float8[]"],
+            (ids, dists, q_emb)
+        )
+        rows = cur.fetchall()
+        cur.close()
+
+    return hospitals_from_rows(rows)
+
+# ---------------- REGISTER ----------------
+# the handlers are async so a request waiting on argon2 holds no threadpool
+# thread; only the short DB calls below run in the threadpool
+
+def create_user(req, password_hash):
+
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+
+        try:
             cur.execute("""
-            INSERT INTO thalassemia_profiles
-            (user_id, full_name, age, blood_group,
-             last_transfusion, interval_days, next_due_date, city)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+            INSERT INTO users (email, password_hash, phone, role)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id;
             """, (
-                user_id,
-                req.full_name,
-                req.age,
-                req.blood_group,
-                last_date,
-                req.interval_days,
-                next_due,
-                req.city
+                req.email,
+                password_hash,
+                req.phone,
+                req.role
             ))
 
-        conn.commit()
-        return {"status": "success"}
+            user_id = cur.fetchone()[0]
+
+            if req.role == "thalassemia":
+                last_date = datetime.strptime(req.last_transfusion, "%Y-%m-%d").date()
+                next_due = last_date + timedelta(days=req.interval_days)
+
+                cur.execute("""
+                INSERT INTO thalassemia_profiles
+                (user_id, full_name, age, blood_group,
+                 last_transfusion, interval_days, next_due_date, city)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+                """, (
+                    user_id,
+                    req.full_name,
+                    req.age,
+                    req.blood_group,
+                    last_date,
+                    req.interval_days,
+                    next_due,
+                    req.city
+                ))
+
+            conn.commit()
+            return {"status": "success"}
+
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "message": str(e)}
+
+        finally:
+            cur.close()
 
-    except Exception as e:
-        conn.rollback()
-        return {"status": "error", "message": str(e)}
+@app.post("/register")
+async def register(req: RegisterRequest):
 
-    finally:
-        cur.close()
-        conn.close()
+    # hashed before checking out a connection so argon2 never holds one
+    password_hash = await shed_hashing_async(hasher.hash_async, req.password)
+
+    return await run_in_threadpool(create_user, req, password_hash)
 
 # ---------------- LOGIN ----------------
-@app.post("/login")
-def login(req: LoginRequest):
+def find_user(email):
+
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, password_hash, role FROM users WHERE email=%s", (email,))
+        user = cur.fetchone()
+        cur.close()
 
-    conn = psycopg2.connect(**DB)
-    cur = conn.cursor()
+    return user
 
-    cur.execute("SELECT id, password_hash, role FROM users WHERE email=%s", (req.email,))
-    user = cur.fetchone()
+def update_password_hash(user_id, password_hash):
 
-    cur.close()
-    conn.close()
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE users SET password_hash=%s WHERE id=%s", (password_hash, user_id))
+        conn.commit()
+        cur.close()
+
+@app.post("/login")
+async def login(req: LoginRequest):
+
+    user = await run_in_threadpool(find_user, req.email)
 
     if not user:
         return {"error": "Invalid credentials"}
 
     user_id, hashed, role = user
 
-    if not verify_password(req.password, hashed):
+    ok, new_hash = await shed_hashing_async(
+        hasher.verify_and_update_async, req.password, hashed
+    )
+    if not ok:
         return {"error": "Invalid credentials"}
 
+    if new_hash is not None:
+        await run_in_threadpool(update_password_hash, user_id, new_hash)
+
     token = create_token({"user_id": user_id, "role": role})
 
     return {"access_token": token}
 
 # ---------------- RECOMMEND ----------------
 @app.post("/recommend")
+@profiler.profiled
 def recommend(req: SearchRequest):
 
     hospitals = hybrid_search(
@@ -305,86 +603,501 @@ def recommend(req: SearchRequest):
         blood_col=req.blood_type,
         user_query=req.query,
         user_lat=req.user_lat,
-        user_lon=req.user_lon
+        user_lon=req.user_lon,
+        compatible=req.compatible,
+        radius_km=req.radius_km,
+        nearest=req.nearest
     )
 
-    for h in hospitals:
-        h["explanation"] = explain(h)
+    for h, text in zip(hospitals, explain_all(hospitals)):
+        h["explanation"] = text
 
     return {"recommendations": hospitals}
 
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/recommend/stream")
+def recommend_stream(req: SearchRequest):
+
+    hospitals = hybrid_search(
+        city=req.city,
+        blood_col=req.blood_type,
+        user_query=req.query,
+        user_lat=req.user_lat,
+        user_lon=req.user_lon,
+        compatible=req.compatible,
+        radius_km=req.radius_km,
+        nearest=req.nearest
+    )
+
+    def events():
+        # ranked list first, then one event per explanation as it completes
+        yield sse("recommendations", {"recommendations": hospitals})
+        for i, text in iter_explanations(hospitals):
+            yield sse("explanation", {"index": i, "explanation": text})
+        yield sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ---------------- BATCH RECOMMEND ----------------
+# every request's candidates go to Postgres in one statement; blood types are
+# matched through blood_inventory so requests for different columns share it
+# per request: most compatible units first for compatible searches, the
+# single-request hybrid score otherwise ($7 holds one query vector per
+# request, NULL for compatible ones and for vectors from another model)
+BATCH_SQL = f"""
+    WITH c AS (
+        SELECT * FROM unnest($1::int[], $2::text[], $3::float8[]) AS c(req, id, distance_km)
+    ),
+    d AS (
+        SELECT * FROM unnest($4::int[], $5::text[]) AS d(req, donor)
+    ),
+    q AS (
+        SELECT n - 1 AS req, v::vector AS embedding
+        FROM unnest($7::text[]) WITH ORDINALITY AS q(v, n)
+    ),
+    matched AS (
+        SELECT
+            c.req,
+            h.name,
+            h.rating,
+            h.avg_response_time_mins,
+            h.icu_beds_available,
+            SUM(i.units) AS units,
+            c.distance_km,
+            h.id,
+            h.embedding
+        FROM c
+        JOIN d ON d.req = c.req
+        JOIN blood_inventory i
+          ON i.hospital_id = c.id AND i.blood_type = d.donor AND i.units > 0
+        JOIN hospitals h ON h.id::text = c.id
+        GROUP BY c.req, h.id, c.distance_km
+    )
+    SELECT req, name, rating, avg_response_time_mins, icu_beds_available,
+           units, distance_km, id
+    FROM (
+        SELECT h.*,
+               row_number() OVER (
+                   PARTITION BY h.req
+                   ORDER BY CASE WHEN h.req = ANY($6::int[]) THEN -h.units END,
+                            {hybrid_score_sql("q.embedding", "h.distance_km")},
+                            h.distance_km
+               ) AS rn
+        FROM matched h
+        LEFT JOIN q ON q.req = h.req
+    ) ranked
+    WHERE rn <= 5
+    ORDER BY req, rn
+    """
+
+def vector_literal(vec):
+    if vec is None:
+        return None
+    return "[" + ",".join(repr(float(x)) for x in vec) + "]"
+
+def hybrid_search_batch(reqs):
+
+    # one embedding pass for every query that is ranked by the hybrid score
+    ranked = [r.query for r in reqs if not r.compatible]
+    vectors = iter(embed_many(ranked) if ranked else [])
+    q_vecs = [None if r.compatible else vector_literal(next(vectors)) for r in reqs]
+
+    c_req, c_ids, c_dists = [], [], []
+    d_req, d_donor = [], []
+    compatible_reqs = []
+
+    for n, r in enumerate(reqs):
+        ids, dists = hybrid_candidates(
+            r.city, r.blood_type, r.user_lat, r.user_lon, r.radius_km, r.nearest
+        )
+        c_req += [n] * len(ids)
+        c_ids += ids
+        c_dists += dists
+
+        blood_type = to_blood_type(r.blood_type)
+        donors = COMPATIBLE_DONORS[blood_type] if r.compatible else [blood_type]
+        d_req += [n] * len(donors)
+        d_donor += donors
+        if r.compatible:
+            compatible_reqs.append(n)
+
+    results = [[] for _ in reqs]
+    if not c_ids:
+        return results
+
+    with db_pool.connection() as conn, metrics.timer("db_execute"):
+        cur = execute_prepared(
+            conn, "hybrid_batch", BATCH_SQL,
+            ["int[]", "text[]", "float8[]", "int[]", "text[]", "int[]", "text[]"],
+            (c_req, c_ids, c_dists, d_req, d_donor, compatible_reqs, q_vecs)
+        )
+        rows = cur.fetchall()
+        cur.close()
+
+    for row in rows:
+        results[row[0]] += hospitals_from_rows([row[1:]])
+
+    return results
+
+@app.post("/recommend/batch")
+def recommend_batch(req: BatchSearchRequest):
+
+    results = hybrid_search_batch(req.requests)
+
+    if req.explain:
+        # one shared deadline for every explanation in the batch
+        flat = [h for hospitals in results for h in hospitals]
+        for h, text in zip(flat, explain_all(flat)):
+            h["explanation"] = text
+
+    return {"results": [{"recommendations": hospitals} for hospitals in results]}
+
 # ---------------- FEEDBACK ----------------
 @app.post("/feedback")
 def submit_feedback(req: FeedbackRequest):
 
-    conn = psycopg2.connect(**DB)
-    cur = conn.cursor()
-
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS feedback (
-        id SERIAL PRIMARY KEY,
-        hospital TEXT,
-        rating BOOLEAN,
-        comment TEXT,
-        lat FLOAT,
-        lon FLOAT,
-        created_at TIMESTAMP DEFAULT NOW()
-    );
-    """)
-
-    cur.execute("""
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+        INSERT INTO feedback (hospital, rating, comment, lat, lon)
+        VALUES (%s, %s, %s, %s, %s);
+        """, (
+            req.hospital,
+            req.rating,
+            req.comment,
+            req.user_lat,
+            req.user_lon
+        ))
+
+        conn.commit()
+        cur.close()
+
+    return {"status": "success"}
+
+# ---------------- ASYNC PATH ----------------
+# Same behaviour as /recommend, /login and /feedback, but waiting on Postgres,
+# the embedder or the LLM never holds a worker thread.
+async_db = AsyncDB(
+    DB,
+    min_size=int(os.getenv("DB_POOL_MIN", "1")),
+    max_size=int(os.getenv("DB_POOL_MAX", "10"))
+)
+async_http = AsyncHTTP(max_connections=int(os.getenv("OLLAMA_MAX_CONNECTIONS", "100")))
+
+async def embed_async(text):
+    # the cache may read or commit to sqlite, so it stays off the event loop
+    vec = await asyncio.to_thread(embed_cache.get, embedder.model, text)
+    if vec is not None:
+        return await asyncio.to_thread(in_hospital_space, vec, embedder.model)
+    with metrics.timer("embed"):
+        vectors, model = await embedder.embed_tagged_async([text], async_http.client())
+    vectors = await asyncio.to_thread(cache_embeddings, [text], vectors, model)
+    return await asyncio.to_thread(in_hospital_space, vectors[0], model)
+
+async def generate_explanation_async(hospital):
+    with metrics.timer("explain"):
+        r = await async_http.client().post(OLLAMA_CHAT_URL, json={
+            "model": EXPLAIN_MODEL,
+            "prompt": explain_prompt(hospital),
+            "stream": False
+        })
+        return r.json()["response"]
+
+# the async endpoints' jobs, bounded and shared the same way as explain_jobs
+explain_jobs_async = AsyncInflightExplanations(
+    generate_explanation_async, explain_cache, max_pending=EXPLAIN_MAX_PENDING
+)
+
+async def explain_all_async(hospitals, deadline=EXPLAIN_DEADLINE):
+    # same contract as explain_all: one shared deadline, templates for
+    # anything late, rejected or failed; jobs left waiting are cancelled
+    claimed = []
+    try:
+        for h in hospitals:
+            claimed.append(explain_jobs_async.claim(h))
+
+        pending = {t for t in claimed if t is not None}
+        if pending:
+            await asyncio.wait(pending, timeout=deadline)
+
+        explanations = []
+        for h, t in zip(hospitals, claimed):
+            if t is not None and t.done() and not t.cancelled() and t.exception() is None:
+                explanations.append(t.result())
+            else:
+                explanations.append(template_explanation(h))
+        return explanations
+
+    finally:
+        # also runs when the client disconnects and this coroutine is cancelled
+        for h, t in zip(hospitals, claimed):
+            if t is not None:
+                explain_jobs_async.release(h, t)
+
+async def hybrid_search_async(city, blood_col, user_query, user_lat, user_lon, compatible=False,
+                              radius_km=None, nearest=None):
+
+    # same engine choice as hybrid_search, so both paths rank alike
+    if not compatible and use_ranking_engine(city, radius_km, nearest):
+        q_emb = await embed_async(user_query)
+        return await run_in_threadpool(rank_in_memory, city, blood_col, q_emb, user_lat, user_lon)
+
+    # first call builds the spatial index from the sync pool
+    ids, dists = await run_in_threadpool(
+        hybrid_candidates, city, blood_col, user_lat, user_lon, radius_km, nearest
+    )
+    if not ids:
+        return []
+
+    pool = await async_db.pool()
+
+    if compatible:
+        with metrics.timer("db_execute"):
+            rows = await pool.fetch(COMPATIBLE_SQL, ids, dists, to_blood_type(blood_col))
+        return hospitals_from_rows(rows)
+
+    q_emb = await embed_async(user_query)
+
+    with metrics.timer("db_execute"):
+        rows = await pool.fetch(hybrid_sql(blood_col), ids, dists, q_emb)
+
+    return hospitals_from_rows(rows)
+
+@app.post("/async/recommend")
+async def recommend_async(req: SearchRequest):
+
+    hospitals = await hybrid_search_async(
+        city=req.city,
+        blood_col=req.blood_type,
+        user_query=req.query,
+        user_lat=req.user_lat,
+        user_lon=req.user_lon,
+        compatible=req.compatible,
+        radius_km=req.radius_km,
+        nearest=req.nearest
+    )
+
+    for h, text in zip(hospitals, await explain_all_async(hospitals)):
+        h["explanation"] = text
+
+    return {"recommendations": hospitals}
+
+@app.post("/async/login")
+async def login_async(req: LoginRequest):
+
+    pool = await async_db.pool()
+    user = await pool.fetchrow(
+        "SELECT id, password_hash, role FROM users WHERE email=$1", req.email
+    )
+
+    if not user:
+        return {"error": "Invalid credentials"}
+
+    user_id, hashed, role = user
+
+    ok, new_hash = await shed_hashing_async(
+        hasher.verify_and_update_async, req.password, hashed
+    )
+    if not ok:
+        return {"error": "Invalid credentials"}
+
+    if new_hash is not None:
+        await pool.execute(
+            "UPDATE users SET password_hash=$1 WHERE id=$2", new_hash, user_id
+        )
+
+    token = create_token({"user_id": user_id, "role": role})
+
+    return {"access_token": token}
+
+@app.post("/async/feedback")
+async def submit_feedback_async(req: FeedbackRequest):
+
+    pool = await async_db.pool()
+    await pool.execute("""
     INSERT INTO feedback (hospital, rating, comment, lat, lon)
-    VALUES (%s, %s, %s, %s, %s);
-    """, (
+    VALUES ($1, $2, $3, $4, $5);
+    """,
         req.hospital,
         req.rating,
         req.comment,
         req.user_lat,
         req.user_lon
-    ))
-
-    conn.commit()
-    cur.close()
-    conn.close()
+    )
 
     return {"status": "success"}
 
-# ---------------- REMINDER SCHEDULER ----------------
-def check_reminders():
+@app.on_event("shutdown")
+async def close_async_clients():
+    await async_db.close()
+    await async_http.close()
 
-    conn = psycopg2.connect(**DB)
-    cur = conn.cursor()
+@app.on_event("shutdown")
+def close_outbox():
+    # quits the pooled SMTP sessions
+    outbox.close()
 
-    today = date.today()
+@app.on_event("shutdown")
+def close_hasher():
+    hasher.close()
 
-    cur.execute("""
-    SELECT u.email, u.phone, t.full_name, t.next_due_date
-    FROM thalassemia_profiles t
-    JOIN users u ON t.user_id = u.id;
-    """)
+# ---------------- REMINDER SCHEDULER ----------------
+# patients due within this many days (or already overdue) get a reminder
+REMINDER_WINDOW_DAYS = int(os.getenv("REMINDER_WINDOW_DAYS", "2"))
+
+def check_reminders():
 
-    rows = cur.fetchall()
+    # select and claim due patients in one statement; the ledger's primary
+    # key means each (patient, due date) is claimed by exactly one run, and
+    # the outbox rows commit in the same transaction as the claim
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
 
-    for email, phone, name, next_due in rows:
-        if (next_due - today).days <= 2:
+        cur.execute("""
+        WITH claimed AS (
+            INSERT INTO reminders_sent (profile_id, due_date)
+            SELECT id, next_due_date
+            FROM thalassemia_profiles
+            WHERE next_due_date <= CURRENT_DATE + %s
+            ON CONFLICT DO NOTHING
+            RETURNING profile_id, due_date
+        )
+        SELECT u.email, u.phone, t.full_name, c.due_date
+        FROM claimed c
+        JOIN thalassemia_profiles t ON t.id = c.profile_id
+        JOIN users u ON t.user_id = u.id;
+        """, (REMINDER_WINDOW_DAYS,))
+
+        messages = []
+        for email, phone, name, next_due in cur.fetchall():
             message = f"""
 Hi {name},
 Your blood transfusion is due on {next_due}.
 Please schedule your hospital visit.
 """
-            send_email(email, message)
-            send_sms(phone, message)
+            messages.append(("email", email, "ThalCare Reminder", message))
+            messages.append(("sms", phone, None, message))
+
+        enqueue(cur, messages)
+        conn.commit()
+        cur.close()
+
+    # deliver now rather than at the next drain tick, but on a scheduler
+    # thread: the caller (the daily job or /test-reminder) returns straight away
+    if messages:
+        scheduler.add_job(outbox.drain)
 
-    cur.close()
-    conn.close()
+def refresh_hospital_indexes():
+    # in-memory copies of hospitals follow writes made by other processes,
+    # such as scripts/load_hospitals.py; unchanged tables cost one stats query
+    refresh_spatial_index(db_pool.connection)
+    refresh_ranking_engine(db_pool.connection)
+    refresh_embedding_models(db_pool.connection)
 
 scheduler = BackgroundScheduler()
 scheduler.add_job(check_reminders, "interval", hours=24)
+scheduler.add_job(
+    refresh_hospital_indexes, "interval",
+    seconds=int(os.getenv("HOSPITAL_REFRESH_SECONDS", "60"))
+)
+# picks up retries whose backoff has elapsed
+scheduler.add_job(
+    outbox.drain, "interval",
+    seconds=int(os.getenv("NOTIFY_DRAIN_SECONDS", "60"))
+)
+
+# tables and indexes are created once here, not on every write
+@app.on_event("startup")
+def run_migrations():
+    with db_pool.connection() as conn:
+        applied = migrate(conn)
+    if applied:
+        print(f"Applied migrations: {', '.join(applied)}")
 
 @app.on_event("startup")
 def start_scheduler():
     scheduler.start()
 
+@app.on_event("startup")
+def warm_embed_cache():
+    # off the startup path so the API comes up even if Ollama is still loading
+    threading.Thread(
+        target=embed_cache.warm,
+        # straight to the primary model so fallback vectors are never cached
+        args=(embedder.model, WARMUP_PHRASES, getattr(embedder, "primary", embedder).embed),
+        daemon=True
+    ).start()
+
+@app.get("/embed-cache/stats")
+def embed_cache_stats():
+    return embed_cache.stats()
+
+# ---------------- METRICS ----------------
+def cache_lookups():
+    embed_stats = embed_cache.stats()
+    explain_stats = explain_cache.stats()
+    return [
+        ({"cache": "embed", "result": "hit"}, embed_stats["hits"]),
+        ({"cache": "embed", "result": "disk_hit"}, embed_stats["disk_hits"]),
+        ({"cache": "embed", "result": "miss"}, embed_stats["misses"]),
+        ({"cache": "explain", "result": "hit"}, explain_stats["hits"]),
+        ({"cache": "explain", "result": "miss"}, explain_stats["misses"]),
+    ]
+
+metrics.register("cache_lookups_total", "Embedding and explanation cache lookups.",
+                 "counter", cache_lookups)
+metrics.register("password_hash_shed_total", "Logins and registrations refused with 503.",
+                 "counter", lambda: [({}, hasher.stats()["shed"])])
+metrics.register("embed_fallbacks_total", "Embeddings served by the fallback embedder.",
+                 "counter", lambda: [({}, embedder.stats().get("fallbacks", 0))])
+
+@app.get("/metrics")
+def metrics_endpoint():
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/profiles/{profile_id}")
+def profile_report(profile_id: str, request: Request):
+    if not profiler.authorized(profile_token(request)):
+        raise HTTPException(status_code=404, detail="Not found")
+    report = profiler.report(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return Response(report, media_type="text/plain")
+
+@app.get("/embedder/stats")
+def embedder_stats():
+    return embedder.stats()
+
+@app.get("/explain-cache/stats")
+def explain_cache_stats():
+    return {
+        **explain_cache.stats(),
+        **explain_jobs.stats(),
+        "async": explain_jobs_async.stats(),
+    }
+
+@app.post("/explain-cache/invalidate/{hospital_id}")
+def invalidate_explanations(hospital_id: str):
+    # call when a hospital's blood inventory or ICU beds change
+    return {"invalidated": explain_cache.invalidate(hospital_id)}
+
+@app.get("/auth/hasher-stats")
+def hasher_stats():
+    return hasher.stats()
+
+@app.get("/notifications/stats")
+def notification_stats():
+    return outbox.stats()
+
 # ---------------- EMERGENCY ----------------
 @app.get("/emergency")
 def emergency():
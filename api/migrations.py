@@ -0,0 +1,249 @@
+import os
+import psycopg2
+from dotenv import load_dotenv
+
+from api.services.blood_types import BLOOD_TYPES, COMPATIBLE_DONORS
+
+_COMPATIBILITY_ROWS = ",\n        ".join(
+    f"('{recipient}', '{donor}')"
+    for recipient, donors in COMPATIBLE_DONORS.items()
+    for donor in donors
+)
+_INVENTORY_SELECT = "\n        UNION ALL ".join(
+    f"SELECT id::text, '{bt}', COALESCE({col}, 0) FROM hospitals"
+    for bt, col in BLOOD_TYPES.items()
+)
+_INVENTORY_VALUES = ",\n            ".join(
+    f"(NEW.id::text, '{bt}', COALESCE(NEW.{col}, 0))"
+    for bt, col in BLOOD_TYPES.items()
+)
+
+# Ordered, append-only. Each entry runs once, inside a transaction, and is
+# recorded in schema_migrations. Never edit a shipped migration; add a new one.
+MIGRATIONS = [
+    ("001_base_tables", """
+    CREATE EXTENSION IF NOT EXISTS vector;
+
+    CREATE TABLE IF NOT EXISTS hospitals (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        lat DOUBLE PRECISION,
+        lon DOUBLE PRECISION,
+        address TEXT,
+        city TEXT,
+        type TEXT,
+        trauma_level INTEGER,
+        rating DOUBLE PRECISION,
+        avg_response_time_mins INTEGER,
+        icu_beds_available INTEGER,
+        verified_status BOOLEAN,
+        phone TEXT,
+        website TEXT,
+        last_updated TIMESTAMP,
+        blood_a_pos INTEGER DEFAULT 0,
+        blood_a_neg INTEGER DEFAULT 0,
+        blood_b_pos INTEGER DEFAULT 0,
+        blood_b_neg INTEGER DEFAULT 0,
+        blood_o_pos INTEGER DEFAULT 0,
+        blood_o_neg INTEGER DEFAULT 0,
+        blood_ab_pos INTEGER DEFAULT 0,
+        blood_ab_neg INTEGER DEFAULT 0,
+        embedding vector(768),
+        embedding_hash TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        email TEXT UNIQUE,
+        password_hash TEXT,
+        phone TEXT,
+        role TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS thalassemia_profiles (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id),
+        full_name TEXT,
+        age INTEGER,
+        blood_group TEXT,
+        last_transfusion DATE,
+        interval_days INTEGER,
+        next_due_date DATE,
+        city TEXT
+    );
+
+    CREATE TABLE IF NOT EXISTS feedback (
+        id SERIAL PRIMARY KEY,
+        hospital TEXT,
+        rating BOOLEAN,
+        comment TEXT,
+        lat FLOAT,
+        lon FLOAT,
+        created_at TIMESTAMP DEFAULT NOW()
+    );
+    """),
+
+    ("002_lookup_indexes", """
+    -- databases created before hospitals was versioned may lack this column
+    ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS embedding_hash TEXT;
+
+    -- users.email is UNIQUE, which already gives login its index
+    CREATE INDEX IF NOT EXISTS hospitals_city_idx ON hospitals (city);
+    CREATE INDEX IF NOT EXISTS thalassemia_profiles_next_due_idx
+        ON thalassemia_profiles (next_due_date);
+
+    -- hybrid search filters on city AND blood_<type> > 0
+    CREATE INDEX IF NOT EXISTS hospitals_city_a_pos_idx ON hospitals (city) WHERE blood_a_pos > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_a_neg_idx ON hospitals (city) WHERE blood_a_neg > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_b_pos_idx ON hospitals (city) WHERE blood_b_pos > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_b_neg_idx ON hospitals (city) WHERE blood_b_neg > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_o_pos_idx ON hospitals (city) WHERE blood_o_pos > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_o_neg_idx ON hospitals (city) WHERE blood_o_neg > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_ab_pos_idx ON hospitals (city) WHERE blood_ab_pos > 0;
+    CREATE INDEX IF NOT EXISTS hospitals_city_ab_neg_idx ON hospitals (city) WHERE blood_ab_neg > 0;
+    """),
+
+    ("003_blood_inventory", f"""
+    -- one row per (hospital, blood type); the blood_* columns stay the write
+    -- path and a trigger mirrors them here
+    CREATE TABLE IF NOT EXISTS blood_inventory (
+        hospital_id TEXT NOT NULL,
+        blood_type TEXT NOT NULL,
+        units INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (hospital_id, blood_type)
+    );
+
+    CREATE INDEX IF NOT EXISTS blood_inventory_available_idx
+        ON blood_inventory (hospital_id, blood_type) INCLUDE (units)
+        WHERE units > 0;
+
+    CREATE TABLE IF NOT EXISTS blood_compatibility (
+        recipient TEXT NOT NULL,
+        donor TEXT NOT NULL,
+        PRIMARY KEY (recipient, donor)
+    );
+
+    INSERT INTO blood_compatibility (recipient, donor) VALUES
+        {_COMPATIBILITY_ROWS}
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO blood_inventory (hospital_id, blood_type, units)
+        {_INVENTORY_SELECT}
+    ON CONFLICT (hospital_id, blood_type) DO UPDATE SET units = EXCLUDED.units;
+
+    CREATE OR REPLACE FUNCTION sync_blood_inventory() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM blood_inventory WHERE hospital_id = OLD.id::text;
+            RETURN OLD;
+        END IF;
+        INSERT INTO blood_inventory (hospital_id, blood_type, units) VALUES
+            {_INVENTORY_VALUES}
+        ON CONFLICT (hospital_id, blood_type) DO UPDATE SET units = EXCLUDED.units;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    DROP TRIGGER IF EXISTS hospitals_blood_inventory_sync ON hospitals;
+    CREATE TRIGGER hospitals_blood_inventory_sync
+        AFTER INSERT OR DELETE OR UPDATE OF {", ".join(BLOOD_TYPES.values())}
+        ON hospitals
+        FOR EACH ROW EXECUTE FUNCTION sync_blood_inventory();
+    """),
+
+    ("004_reminders_sent", """
+    -- one reminder per patient per due date, however often the job runs
+    CREATE TABLE IF NOT EXISTS reminders_sent (
+        profile_id INTEGER NOT NULL REFERENCES thalassemia_profiles(id) ON DELETE CASCADE,
+        due_date DATE NOT NULL,
+        sent_at TIMESTAMP DEFAULT NOW(),
+        PRIMARY KEY (profile_id, due_date)
+    );
+    """),
+
+    ("005_notification_outbox", """
+    -- pending email / SMS; drained by api.services.notifications.Outbox
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id BIGSERIAL PRIMARY KEY,
+        channel TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        subject TEXT,
+        body TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        locked_at TIMESTAMP,
+        last_error TEXT,
+        created_at TIMESTAMP DEFAULT NOW(),
+        sent_at TIMESTAMP
+    );
+
+    -- sent / dead rows drop out of the index the workers poll
+    CREATE INDEX IF NOT EXISTS notification_outbox_due_idx
+        ON notification_outbox (next_attempt_at)
+        WHERE status IN ('pending', 'sending');
+    """),
+
+    ("006_embedding_version", """
+    -- which embedder produced each hospital vector, so mixed or stale
+    -- vectors can be found and re-embedded
+    ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+    ALTER TABLE hospitals ADD COLUMN IF NOT EXISTS embedding_dim INTEGER;
+    """),
+]
+
+# arbitrary constant; serialises concurrent API workers running migrate()
+MIGRATION_LOCK_ID = 804211
+
+
+def migrate(conn):
+    cur = conn.cursor()
+
+    cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+    try:
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version TEXT PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT NOW()
+        );
+        """)
+        conn.commit()
+
+        cur.execute("SELECT version FROM schema_migrations;")
+        applied = {r[0] for r in cur.fetchall()}
+
+        ran = []
+        for version, sql in MIGRATIONS:
+            if version in applied:
+                continue
+            cur.execute(sql)
+            cur.execute("INSERT INTO schema_migrations (version) VALUES (%s);", (version,))
+            conn.commit()
+            ran.append(version)
+
+        return ran
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cur.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    conn = psycopg2.connect(
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=int(os.getenv("DB_PORT")),
+    )
+    ran = migrate(conn)
+    conn.close()
+
+    print(f"Applied {len(ran)} migration(s): {', '.join(ran) or 'none'}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, func
 from sqlalchemy.orm import relationship
 from databases import Base
 
@@ -11,7 +11,7 @@ class User(Base):
     phone = Column(String)
     role = Column(String, nullable=False)
 
-    profile = relationship("ThalassemiaProfile", back_populates="users", uselist=False)
+    profile = relationship("ThalassemiaProfile", back_populates="user", uselist=False)
 
 class ThalassemiaProfile(Base):
     __tablename__ = "thalassemia_profiles"
@@ -26,4 +26,13 @@ class ThalassemiaProfile(Base):
     next_due_date = Column(Date)
     city = Column(String)
 
-    user = relationship("User", back_populates="profile")
\ No newline at end of file
+    user = relationship("User", back_populates="profile")
+
+class ReminderSent(Base):
+    __tablename__ = "reminders_sent"
+
+    profile_id = Column(
+        Integer, ForeignKey("thalassemia_profiles.id", ondelete="CASCADE"), primary_key=True
+    )
+    due_date = Column(Date, primary_key=True)
+    sent_at = Column(DateTime, server_default=func.now())
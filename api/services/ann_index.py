@@ -0,0 +1,122 @@
+import weakref
+
+from api.services.blood_types import BLOOD_COLUMNS
+
+# pgvector approximate-nearest-neighbour index over hospitals.embedding.
+# Build parameters trade index size/build time for recall; search parameters
+# trade latency for recall and can be changed per query.
+#
+# Only scripts/ann_report.py searches through it for now: the API's hybrid
+# ranking scores a city's candidates from the spatial index and never does a
+# pure vector top-k, so there is nothing for the ANN index to speed up there.
+INDEX_NAMES = {
+    "hnsw": "hospitals_embedding_hnsw_idx",
+    "ivfflat": "hospitals_embedding_ivfflat_idx",
+}
+
+# the extension version cannot change under an open connection
+_versions = weakref.WeakKeyDictionary()
+
+
+def pgvector_version(conn):
+    version = _versions.get(conn)
+    if version is None:
+        cur = conn.cursor()
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector';")
+        row = cur.fetchone()
+        cur.close()
+        version = _versions[conn] = tuple(int(p) for p in row[0].split(".")) if row else (0,)
+    return version
+
+
+def build_ann_index(conn, method="hnsw", m=16, ef_construction=64, lists=100):
+    if method not in INDEX_NAMES:
+        raise ValueError(f"Unknown ANN method: {method}")
+
+    cur = conn.cursor()
+    for name in INDEX_NAMES.values():
+        cur.execute(f"DROP INDEX IF EXISTS {name};")
+
+    if method == "hnsw":
+        cur.execute(f"""
+        CREATE INDEX {INDEX_NAMES['hnsw']} ON hospitals
+        USING hnsw (embedding vector_l2_ops)
+        WITH (m = {int(m)}, ef_construction = {int(ef_construction)});
+        """)
+    else:
+        cur.execute(f"""
+        CREATE INDEX {INDEX_NAMES['ivfflat']} ON hospitals
+        USING ivfflat (embedding vector_l2_ops)
+        WITH (lists = {int(lists)});
+        """)
+
+    cur.execute("ANALYZE hospitals;")
+    conn.commit()
+    cur.close()
+
+
+def drop_ann_index(conn):
+    cur = conn.cursor()
+    for name in INDEX_NAMES.values():
+        cur.execute(f"DROP INDEX IF EXISTS {name};")
+    conn.commit()
+    cur.close()
+
+
+def _filters(city, blood_col):
+    # rows without a vector have no distance; exact scans would return them last
+    where, params = ["embedding IS NOT NULL"], []
+    if city is not None:
+        where.append("city = %s")
+        params.append(city)
+    if blood_col is not None:
+        if blood_col not in BLOOD_COLUMNS:
+            raise ValueError(f"Unknown blood column: {blood_col}")
+        where.append(f"{blood_col} > 0")
+    return "WHERE " + " AND ".join(where), params
+
+
+def _nearest(cur, query_embedding, k, city, blood_col):
+    where, params = _filters(city, blood_col)
+    cur.execute(f"""
+    SELECT id, name, embedding <-> %s::vector AS vec_dist
+    FROM hospitals
+    {where}
+    ORDER BY embedding <-> %s::vector
+    LIMIT %s;
+    """, [query_embedding, *params, query_embedding, k])
+    return cur.fetchall()
+
+
+def ann_search(conn, query_embedding, k=5, city=None, blood_col=None,
+               ef_search=40, probes=10):
+    cur = conn.cursor()
+    cur.execute("SET LOCAL hnsw.ef_search = %s;", (int(ef_search),))
+    cur.execute("SET LOCAL ivfflat.probes = %s;", (int(probes),))
+
+    filtered = city is not None or blood_col is not None
+    if filtered and pgvector_version(conn) >= (0, 8, 0):
+        # keep walking the graph until enough rows pass the WHERE clause
+        cur.execute("SET LOCAL hnsw.iterative_scan = relaxed_order;")
+        cur.execute("SET LOCAL ivfflat.iterative_scan = relaxed_order;")
+
+    rows = _nearest(cur, query_embedding, k, city, blood_col)
+
+    # older pgvector filters after the index scan and can come back short
+    if filtered and len(rows) < k:
+        cur.execute("SET LOCAL enable_indexscan = off;")
+        rows = _nearest(cur, query_embedding, k, city, blood_col)
+
+    conn.rollback()
+    cur.close()
+    return sorted(rows, key=lambda r: r[2])
+
+
+def exact_search(conn, query_embedding, k=5, city=None, blood_col=None):
+    cur = conn.cursor()
+    cur.execute("SET LOCAL enable_indexscan = off;")
+    cur.execute("SET LOCAL enable_bitmapscan = off;")
+    rows = _nearest(cur, query_embedding, k, city, blood_col)
+    conn.rollback()
+    cur.close()
+    return rows
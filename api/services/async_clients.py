@@ -0,0 +1,59 @@
+import asyncio
+
+import asyncpg
+import httpx
+
+
+class AsyncDB:
+    """Lazily created asyncpg pool; asyncpg prepares and caches statements per connection."""
+
+    def __init__(self, dsn, min_size=1, max_size=10):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        database=self.dsn["dbname"],
+                        user=self.dsn["user"],
+                        password=self.dsn["password"],
+                        host=self.dsn["host"],
+                        port=self.dsn["port"],
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                    )
+        return self._pool
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+class AsyncHTTP:
+    """One keep-alive httpx client shared by every in-flight request."""
+
+    def __init__(self, max_connections=100):
+        self.max_connections = max_connections
+        self._client = None
+
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=60,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,34 @@
+# Blood type labels as stored in data/processed_hospitals.json, and the
+# hospitals column that holds each type's units.
+BLOOD_TYPES = {
+    "O+": "blood_o_pos",
+    "O-": "blood_o_neg",
+    "A+": "blood_a_pos",
+    "A-": "blood_a_neg",
+    "B+": "blood_b_pos",
+    "B-": "blood_b_neg",
+    "AB+": "blood_ab_pos",
+    "AB-": "blood_ab_neg",
+}
+
+BLOOD_COLUMNS = list(BLOOD_TYPES.values())
+COLUMN_TO_TYPE = {col: bt for bt, col in BLOOD_TYPES.items()}
+
+# red cell compatibility: recipient -> donor types it can receive
+COMPATIBLE_DONORS = {
+    "O-": ["O-"],
+    "O+": ["O+", "O-"],
+    "A-": ["A-", "O-"],
+    "A+": ["A+", "A-", "O+", "O-"],
+    "B-": ["B-", "O-"],
+    "B+": ["B+", "B-", "O+", "O-"],
+    "AB-": ["AB-", "A-", "B-", "O-"],
+    "AB+": ["AB+", "AB-", "A+", "A-", "B+", "B-", "O+", "O-"],
+}
+
+
+def to_blood_type(value):
+    # accepts either a label ("O+") or a column name ("blood_o_pos")
+    if value in BLOOD_TYPES:
+        return value
+    return COLUMN_TO_TYPE.get(value)
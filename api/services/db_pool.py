@@ -0,0 +1,109 @@
+import time
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    # server-side prepared statement names live per connection
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+class DBPool:
+    """Size-bounded, thread-safe Postgres pool; checkout blocks instead of failing when full."""
+
+    def __init__(self, dsn, minconn=1, maxconn=10, acquire_timeout=10.0, idle_check_seconds=30.0,
+                 metrics=None):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.idle_check_seconds = idle_check_seconds
+        # optional api.services.metrics.Metrics; times checkout as "db_acquire"
+        self.metrics = metrics
+
+        self._pool = None
+        self._init_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def _get_pool(self):
+        # created lazily so importing the API does not need a live database
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    self._pool = ThreadedConnectionPool(
+                        self.minconn, self.maxconn,
+                        connection_factory=PooledConnection,
+                        **self.dsn
+                    )
+        return self._pool
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        # only ping connections that sat idle long enough to have been dropped
+        if time.monotonic() - conn.last_used < self.idle_check_seconds:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @contextmanager
+    def connection(self):
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            if self.metrics is not None:
+                self.metrics.error("db_acquire")
+            raise psycopg2.pool.PoolError("timed out waiting for a database connection")
+
+        pool = None
+        conn = None
+        try:
+            pool = self._get_pool()
+            conn = pool.getconn()
+            if not self._healthy(conn):
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+
+            if self.metrics is not None:
+                self.metrics.observe("db_acquire", time.perf_counter() - start)
+
+            yield conn
+
+            if conn.status != psycopg2.extensions.STATUS_READY:
+                conn.rollback()
+        except Exception:
+            if conn is not None and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            if conn is not None:
+                conn.last_used = time.monotonic()
+                pool.putconn(conn, close=bool(conn.closed))
+            self._slots.release()
+
+    def closeall(self):
+        if self._pool is not None:
+            self._pool.closeall()
+
+
+def execute_prepared(conn, name, sql, param_types, params):
+    # PREPARE once per connection, then EXECUTE by name
+    cur = conn.cursor()
+    if name not in conn.prepared:
+        cur.execute(f"PREPARE {name} ({', '.join(param_types)}) AS {sql}")
+        conn.prepared.add(name)
+    placeholders = ", ".join(["%s"] * len(params))
+    cur.execute(f"EXECUTE {name} ({placeholders})", params)
+    return cur
@@ -1,16 +1,11 @@
-import smtplib
-from email.mime.text import MIMEText
-import os
+from services.notifications import SMTPProvider
 
-def send_email(to_email, subject, message):
-
-    msg = MIMEText(message)
-    msg["Subject"] = subject
-    msg["From"] = os.getenv("EMAIL_ADDRESS")
-    msg["To"] = to_email
+# one sender per process so a bulk run reuses a single authenticated
+# session instead of connecting, STARTTLS-ing and logging in per message
+_sender = None
 
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(os.getenv("EMAIL_ADDRESS"), os.getenv("EMAIL_PASSWORD"))
-    server.send_message(msg)
-    server.quit()
\ No newline at end of file
+def send_email(to_email, subject, message):
+    global _sender
+    if _sender is None:
+        _sender = SMTPProvider.from_env()
+    _sender.send(to_email, subject, message)
@@ -0,0 +1,212 @@
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+
+class Embedder:
+    """Text -> vector. `model` is the version string stored beside every
+    vector this backend produces; `dim` is the vector length (None until the
+    first call for remote backends)."""
+
+    model = None
+    dim = None
+
+    def embed_many(self, texts):
+        raise NotImplementedError
+
+    def embed(self, text):
+        return self.embed_many([text])[0]
+
+    def embed_tagged(self, texts):
+        # (vectors, model that produced them); only fallbacks return another model
+        return self.embed_many(texts), self.model
+
+    async def embed_tagged_async(self, texts, client=None):
+        return await asyncio.to_thread(self.embed_tagged, texts)
+
+    def stats(self):
+        return {"model": self.model, "dim": self.dim}
+
+
+class OllamaEmbedder(Embedder):
+    """Ollama /api/embeddings, one request per text, fanned out over a pool.
+
+    The batch /api/embed endpoint normalizes vectors, so they would not
+    match the stored hospital embeddings.
+    """
+
+    def __init__(self, url, model, timeout=60, workers=8):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _payload(self, text):
+        return {"model": self.model, "prompt": text}
+
+    def _embed_one(self, text):
+        r = self.session.post(self.url, json=self._payload(text), timeout=self.timeout)
+        r.raise_for_status()
+        vec = r.json()["embedding"]
+        self.dim = len(vec)
+        return vec
+
+    def embed_many(self, texts):
+        if len(texts) == 1:
+            return [self._embed_one(texts[0])]
+        return list(self._pool.map(self._embed_one, texts))
+
+    async def embed_tagged_async(self, texts, client=None):
+        # `client` is a shared httpx.AsyncClient; without one, use the thread pool
+        if client is None:
+            return await super().embed_tagged_async(texts)
+
+        async def one(text):
+            r = await client.post(self.url, json=self._payload(text), timeout=self.timeout)
+            r.raise_for_status()
+            return r.json()["embedding"]
+
+        vectors = await asyncio.gather(*(one(t) for t in texts))
+        self.dim = len(vectors[0]) if vectors else self.dim
+        return list(vectors), self.model
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic local embedder for tests, benchmarks and fallback.
+
+    It projects hashed word and character-trigram counts onto `dim` signed
+    buckets (a sparse random projection), then L2-normalises. It needs no
+    model or network, and the same text always gives the same vector.
+    """
+
+    def __init__(self, dim=768, seed=0):
+        self.dim = dim
+        self.seed = seed
+        self.model = f"hashing-v1-{dim}" + (f"-s{seed}" if seed else "")
+        self._key = seed.to_bytes(8, "little")
+
+    def _embed_one(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = text.lower().split()
+        features = words + [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+        for f in features:
+            digest = hashlib.blake2b(f.encode(), digest_size=8, key=self._key).digest()
+            h = int.from_bytes(digest, "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_many(self, texts):
+        return [self._embed_one(t) for t in texts]
+
+
+class FallbackEmbedder(Embedder):
+    """Tries `primary` under a deadline and answers from `fallback` when it is
+    slow or failing. After a fallback the primary is skipped for `cooldown`
+    seconds, so an outage costs one timeout rather than one per request.
+
+    Fallback vectors come from a different model. Callers should check the
+    tag from embed_tagged() before caching or storing them.
+    """
+
+    def __init__(self, primary, fallback, timeout=2.0, cooldown=30.0, workers=8):
+        if primary.dim and fallback.dim and primary.dim != fallback.dim:
+            raise ValueError(f"Embedder dims differ: {primary.dim} != {fallback.dim}")
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.model = primary.model
+
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._skip_until = 0.0
+        self.primary_calls = 0
+        self.fallbacks = 0
+
+    @property
+    def dim(self):
+        return self.primary.dim or self.fallback.dim
+
+    def _use_primary(self):
+        return time.monotonic() >= self._skip_until
+
+    def _degrade(self, texts):
+        with self._lock:
+            self.fallbacks += 1
+            self._skip_until = time.monotonic() + self.cooldown
+        return self.fallback.embed_many(texts), self.fallback.model
+
+    def embed_many(self, texts):
+        return self.embed_tagged(texts)[0]
+
+    def embed_tagged(self, texts):
+        if not self._use_primary():
+            return self._degrade(texts)
+        with self._lock:
+            self.primary_calls += 1
+        future = self._pool.submit(self.primary.embed_many, texts)
+        try:
+            return future.result(timeout=self.timeout), self.primary.model
+        except Exception:
+            # timed out, or the primary raised
+            return self._degrade(texts)
+
+    async def embed_tagged_async(self, texts, client=None):
+        if not self._use_primary():
+            return self._degrade(texts)
+        with self._lock:
+            self.primary_calls += 1
+        try:
+            return await asyncio.wait_for(
+                self.primary.embed_tagged_async(texts, client), self.timeout
+            )
+        except Exception:
+            return self._degrade(texts)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "model": self.model,
+                "dim": self.dim,
+                "fallback_model": self.fallback.model,
+                "timeout": self.timeout,
+                "primary_calls": self.primary_calls,
+                "fallbacks": self.fallbacks,
+                "degraded": not self._use_primary(),
+            }
+
+
+def build_embedder(backend, url=None, model=None, dim=768, timeout=2.0, workers=8):
+    # "ollama", "hashing", or "fallback" (ollama, degrading to hashing)
+    if backend == "hashing":
+        return HashingEmbedder(dim)
+    if backend == "ollama":
+        return OllamaEmbedder(url, model, workers=workers)
+    if backend == "fallback":
+        return FallbackEmbedder(
+            OllamaEmbedder(url, model, workers=workers),
+            HashingEmbedder(dim),
+            timeout=timeout,
+            workers=workers,
+        )
+    raise ValueError(f"Unknown embedder backend: {backend}")
+
+
+def embedder_from_env():
+    # the offline scripts configure their embedder from .env
+    return build_embedder(
+        os.getenv("EMBED_BACKEND", "ollama"),
+        url=os.getenv("OLLAMA_URL"),
+        model=os.getenv("OLLAMA_MODEL"),
+        dim=int(os.getenv("EMBED_DIM", "768")),
+        timeout=float(os.getenv("EMBED_FALLBACK_TIMEOUT", "2")),
+        workers=int(os.getenv("EMBED_WORKERS", "8")),
+    )
@@ -0,0 +1,249 @@
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def band(value, edges):
+    # index of the first edge the value is below, len(edges) if above all
+    for i, edge in enumerate(edges):
+        if value < edge:
+            return i
+    return len(edges)
+
+
+def band_or_none(value, edges):
+    # unknown (NULL) values get a bucket of their own
+    return None if value is None else band(value, edges)
+
+
+def feature_key(hospital):
+    # the explain() prompt only sees these fields; nearby values share a key
+    rating = hospital["rating"]
+    return (
+        str(hospital.get("id") or hospital["name"]),
+        round(float(hospital["distance"])),          # 1 km
+        None if rating is None else round(float(rating), 1),
+        band_or_none(hospital["response"], [10, 20, 30, 45]),
+        band_or_none(hospital["icu"], [1, 3, 6]),
+        band(hospital["blood"] or 0, [1, 5, 10, 20]),
+    )
+
+
+class ExplanationCache:
+    """TTL + LRU cache of generated explanations keyed on bucketed hospital features."""
+
+    def __init__(self, ttl_seconds=6 * 3600, max_entries=4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, hospital):
+        key = feature_key(hospital)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, text = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return text
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, hospital, text):
+        key = feature_key(hospital)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_generate(self, hospital, generate):
+        text = self.get(hospital)
+        if text is None:
+            text = generate(hospital)
+            self.put(hospital, text)
+        return text
+
+    def invalidate(self, hospital_id=None):
+        # hook for inventory / ICU updates; no id clears everything
+        with self._lock:
+            if hospital_id is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            stale = [k for k in self._entries if k[0] == str(hospital_id)]
+            for k in stale:
+                del self._entries[k]
+            return len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class InflightExplanations:
+    """Explanation jobs on a shared pool, at most one per feature key.
+
+    Concurrent requests for the same hospital share one future. When the
+    last request waiting on a job gives up, the job is cancelled if it has
+    not started; a running one finishes and fills the cache. At most
+    `max_pending` jobs are queued or running; beyond that claim() returns
+    None and the caller should fall back to a template.
+    """
+
+    def __init__(self, pool, generate, cache, max_pending=32):
+        self.pool = pool
+        self.generate = generate
+        self.cache = cache
+        self.max_pending = max_pending
+        self._jobs = {}  # feature key -> [future, waiters]
+        # re-entrant: cancel() runs the done callback on the releasing thread
+        self._lock = threading.RLock()
+
+        self.shared = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def claim(self, hospital):
+        text = self.cache.get(hospital)
+        if text is not None:
+            done = Future()
+            done.set_result(text)
+            return done
+
+        key = feature_key(hospital)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                job[1] += 1
+                self.shared += 1
+                return job[0]
+            if len(self._jobs) >= self.max_pending:
+                self.rejected += 1
+                return None
+            future = self.pool.submit(self._run, hospital)
+            self._jobs[key] = [future, 1]
+
+        future.add_done_callback(lambda f: self._forget(key, f))
+        return future
+
+    def release(self, hospital, future):
+        key = feature_key(hospital)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job[0] is not future:
+                return
+            job[1] -= 1
+            if job[1] == 0 and future.cancel():
+                self.cancelled += 1
+
+    def _run(self, hospital):
+        text = self.generate(hospital)
+        self.cache.put(hospital, text)
+        return text
+
+    def _forget(self, key, future):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job[0] is future:
+                del self._jobs[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inflight": len(self._jobs),
+                "max_pending": self.max_pending,
+                "shared": self.shared,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+            }
+
+
+class AsyncInflightExplanations:
+    """InflightExplanations for the async endpoints: asyncio tasks instead of
+    pool futures, same sharing per feature key and same max_pending bound.
+
+    Only touched from the event loop, so it needs no lock. A task nobody
+    waits for any more is cancelled even mid-request, which also closes its
+    HTTP call.
+    """
+
+    def __init__(self, generate, cache, max_pending=32):
+        # generate: coroutine function hospital -> text
+        self.generate = generate
+        self.cache = cache
+        self.max_pending = max_pending
+        self._jobs = {}  # feature key -> [task, waiters]
+
+        self.shared = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def claim(self, hospital):
+        text = self.cache.get(hospital)
+        if text is not None:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(text)
+            return done
+
+        key = feature_key(hospital)
+        job = self._jobs.get(key)
+        if job is not None:
+            job[1] += 1
+            self.shared += 1
+            return job[0]
+        if len(self._jobs) >= self.max_pending:
+            self.rejected += 1
+            return None
+
+        task = asyncio.ensure_future(self._run(hospital))
+        self._jobs[key] = [task, 1]
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task
+
+    def release(self, hospital, task):
+        key = feature_key(hospital)
+        job = self._jobs.get(key)
+        if job is None or job[0] is not task:
+            return
+        job[1] -= 1
+        if job[1] == 0 and not task.done():
+            task.cancel()
+            self.cancelled += 1
+
+    async def _run(self, hospital):
+        text = await self.generate(hospital)
+        self.cache.put(hospital, text)
+        return text
+
+    def _forget(self, key, task):
+        job = self._jobs.get(key)
+        if job is not None and job[0] is task:
+            del self._jobs[key]
+
+    def stats(self):
+        return {
+            "inflight": len(self._jobs),
+            "max_pending": self.max_pending,
+            "shared": self.shared,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+        }
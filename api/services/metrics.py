@@ -0,0 +1,156 @@
+import time
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds: sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(pairs):
+    return ",".join(f'{k}="{v}"' for k, v in pairs)
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Single-label histogram; per-bucket counts are made cumulative at render time."""
+
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def render(self):
+        with self._lock:
+            snapshot = {k: (list(c), s) for k, (c, s) in self._series.items()}
+
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, (counts, total) in sorted(snapshot.items()):
+            running = 0
+            for bound, count in zip(self.buckets, counts):
+                running += count
+                labels = _labels([(self.label, value), ("le", bound)])
+                lines.append(f"{self.name}_bucket{{{labels}}} {running}")
+            running += counts[-1]
+            lines.append(f'{self.name}_bucket{{{_labels([(self.label, value), ("le", "+Inf")])}}} {running}')
+            lines.append(f"{self.name}_sum{{{_labels([(self.label, value)])}}} {_number(total)}")
+            lines.append(f"{self.name}_count{{{_labels([(self.label, value)])}}} {running}")
+        return lines
+
+
+class Counter:
+    """Single-label monotonic counter."""
+
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def render(self):
+        with self._lock:
+            snapshot = dict(self._values)
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for value, count in sorted(snapshot.items()):
+            lines.append(f"{self.name}{{{_labels([(self.label, value)])}}} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.stages.observe(self.stage, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.errors.inc(self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Per-stage latency histograms and error counters in Prometheus text format.
+
+    Counters that other components already keep, such as cache hit counts,
+    are read through callbacks at scrape time, so the hot path pays nothing
+    for them. When disabled, timer() returns a shared no-op.
+    """
+
+    def __init__(self, enabled=True, prefix="thalcare"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.stages = Histogram(
+            f"{prefix}_stage_duration_seconds",
+            "Time spent in each instrumented stage.",
+            "stage",
+        )
+        self.errors = Counter(
+            f"{prefix}_stage_errors_total",
+            "Instrumented stages that raised.",
+            "stage",
+        )
+        self._callbacks = []
+
+    def timer(self, stage):
+        return _Timer(self, stage) if self.enabled else _NULL_TIMER
+
+    def observe(self, stage, seconds):
+        if self.enabled:
+            self.stages.observe(stage, seconds)
+
+    def error(self, stage):
+        if self.enabled:
+            self.errors.inc(stage)
+
+    def register(self, name, help_text, kind, collect):
+        # collect() -> [(labels dict, value), ...], called on every scrape
+        self._callbacks.append((f"{self.prefix}_{name}", help_text, kind, collect))
+
+    def render(self):
+        lines = self.stages.render() + self.errors.render()
+        for name, help_text, kind, collect in self._callbacks:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                suffix = f"{{{_labels(labels.items())}}}" if labels else ""
+                lines.append(f"{name}{suffix} {_number(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,325 @@
+import os
+import time
+import random
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+from psycopg2.extras import execute_values
+
+# relative: the legacy modules import this as services.notifications
+from .rate_limit import TokenBucket
+
+# ---------------- PROVIDERS ----------------
+
+class SMTPProvider:
+    """Sends email over one authenticated SMTP session per worker thread.
+
+    Sessions open lazily and are reused across messages. A session is
+    recycled after max_messages, since providers cap messages per
+    connection. If the server dropped it, it is reopened once.
+    """
+
+    def __init__(self, host, port, user, password, sender=None, starttls=True,
+                 max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender or user
+        self.starttls = starttls
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.connects = 0
+
+        self._local = threading.local()
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("SMTP_HOST", "smtp.gmail.com"),
+            int(os.getenv("SMTP_PORT", "587")),
+            os.getenv("EMAIL_ADDRESS"),
+            os.getenv("EMAIL_PASSWORD"),
+            starttls=os.getenv("SMTP_STARTTLS", "1") == "1",
+            max_messages=int(os.getenv("SMTP_MAX_MESSAGES_PER_SESSION", "100")),
+        )
+
+    def _open(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.user:
+            server.login(self.user, self.password)
+        with self._lock:
+            self.connects += 1
+            self._sessions[threading.get_ident()] = server
+        self._local.session = server
+        self._local.count = 0
+        return server
+
+    def _drop(self):
+        server = getattr(self._local, "session", None)
+        self._local.session = None
+        if server is None:
+            return
+        with self._lock:
+            self._sessions.pop(threading.get_ident(), None)
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+
+    def _session(self):
+        server = getattr(self._local, "session", None)
+        if server is None or self._local.count >= self.max_messages:
+            self._drop()
+            server = self._open()
+        return server
+
+    def send(self, recipient, subject, body):
+        msg = MIMEText(body)
+        msg["Subject"] = subject
+        msg["From"] = self.sender
+        msg["To"] = recipient
+
+        try:
+            self._session().send_message(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # idle sessions get closed server-side; one fresh attempt
+            self._drop()
+            self._session().send_message(msg)
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code != 421:
+                raise
+            self._drop()
+            self._session().send_message(msg)
+        self._local.count += 1
+
+    def close(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for server in sessions:
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                server.close()
+
+
+class TwilioProvider:
+    """Sends SMS through the Twilio REST API."""
+
+    def __init__(self, sid, token, from_phone):
+        # imported here so the stub backend works without twilio installed
+        from twilio.rest import Client
+        self.client = Client(sid, token)
+        self.from_phone = from_phone
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("TWILIO_SID"),
+            os.getenv("TWILIO_AUTH_TOKEN"),
+            os.getenv("TWILIO_PHONE"),
+        )
+
+    def send(self, recipient, subject, body):
+        self.client.messages.create(body=body, from_=self.from_phone, to=recipient)
+
+
+class StubProvider:
+    """Offline stand-in: sleeps like a network call and fails at a fixed rate."""
+
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def send(self, recipient, subject, body):
+        time.sleep(self.latency)
+        with self._lock:
+            if self._rng.random() < self.failure_rate:
+                raise RuntimeError("stub provider failure")
+            self.sent.append((recipient, subject, body))
+
+
+def build_providers(backend="live"):
+    # NOTIFY_BACKEND=stub lets the outbox run with no SMTP / Twilio credentials
+    if backend == "stub":
+        return {"email": StubProvider(), "sms": StubProvider()}
+    return {"email": SMTPProvider.from_env(), "sms": TwilioProvider.from_env()}
+
+
+# ---------------- OUTBOX ----------------
+
+# callers enqueue inside their own transaction with execute_values
+ENQUEUE_SQL = """
+INSERT INTO notification_outbox (channel, recipient, subject, body) VALUES %s;
+"""
+
+CLAIM_SQL = """
+UPDATE notification_outbox
+SET status = 'sending', locked_at = NOW(), attempts = attempts + 1
+WHERE id IN (
+    SELECT id FROM notification_outbox
+    WHERE (status = 'pending' AND next_attempt_at <= NOW())
+       OR (status = 'sending' AND locked_at < NOW() - make_interval(secs => %s))
+    ORDER BY next_attempt_at
+    LIMIT %s
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING id, channel, recipient, subject, body, attempts;
+"""
+
+
+def enqueue(cur, messages):
+    # messages: iterable of (channel, recipient, subject, body)
+    rows = [m for m in messages if m[1]]
+    if rows:
+        execute_values(cur, ENQUEUE_SQL, rows)
+    return len(rows)
+
+
+class Outbox:
+    """Drains notification_outbox with a bounded worker pool.
+
+    Each channel has its own token bucket. Failed sends are retried with
+    exponential backoff and jitter. After max_attempts a row is marked
+    'dead' and left for inspection. Rows stuck in 'sending' past the
+    lease (a crashed worker) are picked up again.
+    """
+
+    def __init__(self, connection, providers, rate_limits=None, workers=4,
+                 batch_size=50, max_attempts=5, base_delay=30.0, max_delay=3600.0,
+                 lease_seconds=300, metrics=None):
+        # `connection` is a context manager factory such as DBPool.connection
+        self.connection = connection
+        self.providers = providers
+        self.buckets = {
+            channel: TokenBucket(rate)
+            for channel, rate in (rate_limits or {}).items()
+        }
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        # optional api.services.metrics.Metrics; times sends as "send_<channel>"
+        self.metrics = metrics
+
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._drain_lock = threading.Lock()
+
+    def backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _claim(self):
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(CLAIM_SQL, (self.lease_seconds, self.batch_size))
+            rows = cur.fetchall()
+            conn.commit()
+            cur.close()
+        return rows
+
+    def _deliver(self, row):
+        msg_id, channel, recipient, subject, body, attempts = row
+        provider = self.providers.get(channel)
+        if provider is None:
+            return msg_id, attempts, f"no provider for channel {channel!r}"
+
+        bucket = self.buckets.get(channel)
+        if bucket is not None:
+            bucket.acquire()
+        start = time.perf_counter()
+        try:
+            provider.send(recipient, subject, body)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.error(f"send_{channel}")
+            return msg_id, attempts, f"{type(e).__name__}: {e}"
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe(f"send_{channel}", time.perf_counter() - start)
+        return msg_id, attempts, None
+
+    def _record(self, results):
+        sent = [(msg_id,) for msg_id, _, error in results if error is None]
+        retry, dead = [], []
+        for msg_id, attempts, error in results:
+            if error is None:
+                continue
+            if attempts >= self.max_attempts:
+                dead.append((error, msg_id))
+            else:
+                retry.append((error, self.backoff(attempts), msg_id))
+
+        with self.connection() as conn:
+            cur = conn.cursor()
+            if sent:
+                cur.executemany("""
+                UPDATE notification_outbox
+                SET status = 'sent', sent_at = NOW(), locked_at = NULL, last_error = NULL
+                WHERE id = %s;
+                """, sent)
+            if retry:
+                cur.executemany("""
+                UPDATE notification_outbox
+                SET status = 'pending', locked_at = NULL, last_error = %s,
+                    next_attempt_at = NOW() + make_interval(secs => %s)
+                WHERE id = %s;
+                """, retry)
+            if dead:
+                cur.executemany("""
+                UPDATE notification_outbox
+                SET status = 'dead', locked_at = NULL, last_error = %s
+                WHERE id = %s;
+                """, dead)
+            conn.commit()
+            cur.close()
+
+        return len(sent), len(retry), len(dead)
+
+    def drain(self):
+        # one drain per process at a time; SKIP LOCKED keeps processes apart
+        totals = {"sent": 0, "retry": 0, "dead": 0}
+        if not self._drain_lock.acquire(blocking=False):
+            return totals
+        try:
+            while True:
+                rows = self._claim()
+                if not rows:
+                    return totals
+                results = list(self._pool.map(self._deliver, rows))
+                sent, retry, dead = self._record(results)
+                totals["sent"] += sent
+                totals["retry"] += retry
+                totals["dead"] += dead
+        finally:
+            self._drain_lock.release()
+
+    def stats(self):
+        with self.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT status, COUNT(*) FROM notification_outbox GROUP BY status;")
+            counts = dict(cur.fetchall())
+            cur.close()
+        return {
+            "workers": self.workers,
+            "max_attempts": self.max_attempts,
+            **{s: counts.get(s, 0) for s in ("pending", "sending", "sent", "dead")},
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        for provider in self.providers.values():
+            if hasattr(provider, "close"):
+                provider.close()
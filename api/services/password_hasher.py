@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the hashing backlog is full."""
+
+
+@lru_cache(maxsize=None)
+def _context(time_cost, memory_cost, parallelism):
+    # built once per process; hashes made with other parameters count as
+    # deprecated, so verify_and_update hands back an upgraded hash
+    return CryptContext(
+        schemes=["argon2"],
+        deprecated="auto",
+        argon2__time_cost=time_cost,
+        argon2__memory_cost=memory_cost,
+        argon2__parallelism=parallelism,
+    )
+
+
+def _prepare(password):
+    # kept from the bcrypt era so existing hashes still verify
+    return password.encode("utf-8")[:72]
+
+
+def _hash(password, params):
+    return _context(*params).hash(_prepare(password))
+
+
+def _verify_and_update(password, hashed, params):
+    return _context(*params).verify_and_update(_prepare(password), hashed)
+
+
+class PasswordHasher:
+    """Runs argon2 on a size-capped executor so auth bursts cannot take every
+    request thread.
+
+    At most `workers` hashes run at once and `max_queue` more may wait.
+    Anything past that raises HasherBusy straight away.
+    """
+
+    def __init__(self, workers=2, max_queue=32, executor="thread",
+                 time_cost=3, memory_cost=65536, parallelism=4):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.params = (time_cost, memory_cost, parallelism)
+
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        self.executor = executor
+        self._pool = pool_cls(max_workers=workers)
+
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.shed = 0
+        self.rehashed = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.workers + self.max_queue:
+                self.shed += 1
+                raise HasherBusy("password hashing queue is full")
+            self.in_flight += 1
+        future = self._pool.submit(fn, *args, self.params)
+        future.add_done_callback(self._release)
+        return future
+
+    def _upgraded(self, result):
+        ok, new_hash = result
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    def hash(self, password):
+        return self._submit(_hash, password).result()
+
+    def verify_and_update(self, password, hashed):
+        # (ok, new_hash); new_hash is set when the stored parameters are stale
+        return self._upgraded(self._submit(_verify_and_update, password, hashed).result())
+
+    async def hash_async(self, password):
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def verify_and_update_async(self, password, hashed):
+        future = self._submit(_verify_and_update, password, hashed)
+        return self._upgraded(await asyncio.wrap_future(future))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executor": self.executor,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "shed": self.shed,
+                "rehashed": self.rehashed,
+                "time_cost": self.params[0],
+                "memory_cost": self.params[1],
+                "parallelism": self.params[2],
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
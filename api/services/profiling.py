@@ -0,0 +1,145 @@
+import io
+import os
+import re
+import hmac
+import time
+import uuid
+import pstats
+import cProfile
+import threading
+from functools import wraps
+from contextvars import ContextVar
+
+# set per request by the HTTP middleware; copied into the worker thread
+# that runs a sync endpoint, so the decorator there can see it
+_active = ContextVar("request_profile", default=None)
+
+_PROFILE_ID = re.compile(r"^[0-9A-Za-z_-]+$")
+
+
+class RequestProfiler:
+    """Opt-in cProfile runs for individual requests.
+
+    A request carrying the admin token runs its endpoint under cProfile. The
+    raw stats go to `<directory>/<id>.prof`, which pstats or snakeviz can
+    load, and a per-function summary goes to `<id>.txt`. Only the newest
+    `keep` profiles are retained. With no token configured this is off.
+
+    cProfile only sees the thread it runs in. Work the endpoint hands to an
+    executor wrapped with pool() is profiled in the worker too and merged
+    into the same report, if it finished before the endpoint returned;
+    other executors show up only as time spent waiting on them.
+    """
+
+    def __init__(self, token=None, directory="profiles", top=40, keep=200):
+        self.token = token
+        self.directory = directory
+        self.top = top
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.token)
+
+    def authorized(self, supplied):
+        return self.enabled and bool(supplied) and hmac.compare_digest(supplied, self.token)
+
+    def activate(self, holder):
+        # holder is filled with {"id": ...} once the endpoint has been profiled
+        return _active.set(holder)
+
+    def deactivate(self, reset):
+        _active.reset(reset)
+
+    def profiled(self, fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            holder = _active.get()
+            if holder is None:
+                return fn(*args, **kwargs)
+
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    tasks = holder.pop("tasks", [])
+                holder["id"] = self.save(fn.__name__, profile, tasks)
+        return wrapper
+
+    def task(self, fn):
+        # fn as is, or, inside a profiled request, fn under its own profiler
+        # whose stats are handed back to the request's holder when it ends
+        holder = _active.get()
+        if holder is None:
+            return fn
+
+        @wraps(fn)
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                with self._lock:
+                    if "id" not in holder:
+                        holder.setdefault("tasks", []).append(profile)
+        return run
+
+    def pool(self, executor):
+        return ProfiledExecutor(executor, self)
+
+    def save(self, name, profile, tasks=()):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(self.directory, profile_id)
+
+        out = io.StringIO()
+        stats = pstats.Stats(profile, stream=out)
+        for task in tasks:
+            stats.add(task)
+        stats.dump_stats(base + ".prof")
+
+        if tasks:
+            out.write(f"merged with {len(tasks)} executor task(s)\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        with open(base + ".txt", "w") as f:
+            f.write(out.getvalue())
+
+        self._prune()
+        return profile_id
+
+    def report(self, profile_id):
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, profile_id + ".txt")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read()
+
+    def _prune(self):
+        reports = sorted(
+            (f for f in os.listdir(self.directory) if f.endswith(".txt")),
+            key=lambda f: os.path.getmtime(os.path.join(self.directory, f))
+        )
+        for f in reports[:max(0, len(reports) - self.keep)]:
+            base = os.path.join(self.directory, f[:-4])
+            for ext in (".txt", ".prof"):
+                if os.path.exists(base + ext):
+                    os.remove(base + ext)
+
+
+class ProfiledExecutor:
+    """Executor proxy: tasks submitted from a profiled request are profiled
+    in the worker thread and merged into that request's report."""
+
+    def __init__(self, executor, profiler):
+        self.executor = executor
+        self.profiler = profiler
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(self.profiler.task(fn), *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.executor, name)
@@ -0,0 +1,217 @@
+import threading
+
+import numpy as np
+
+from api.services.blood_types import BLOOD_COLUMNS
+from api.services.spatial_index import haversine_km, hospitals_version
+
+# one hybrid ranking for every path: the SQL ones build their ORDER BY from
+# hybrid_score_sql(), RankingEngine computes the same score in NumPy
+W_VECTOR = 0.5
+W_DISTANCE = 0.3
+W_RESPONSE = 0.1
+W_RATING = 0.1
+
+
+def hybrid_score_sql(vector, distance):
+    # lower is better; NULL (no embedding, response time or rating) sorts last.
+    # A NULL query vector (one from another embedding space) drops the vector
+    # term: each hospital is then compared with itself, which is 0
+    return (
+        f"(h.embedding <-> COALESCE({vector}, h.embedding)) * {W_VECTOR}"
+        f" + {distance} * {W_DISTANCE}"
+        f" + (h.avg_response_time_mins / 60.0) * {W_RESPONSE}"
+        f" + (1.0 / NULLIF(h.rating, 0)) * {W_RATING}"
+    )
+
+
+class CityBlock:
+    """Columnar arrays for one city's hospitals; embeddings as one float32 matrix."""
+
+    def __init__(self, rows, dim):
+        n = len(rows)
+        self.ids = [str(r["id"]) for r in rows]
+        self.names = [r["name"] for r in rows]
+        self.lat = np.array([r["lat"] for r in rows], dtype=np.float64)
+        self.lon = np.array([r["lon"] for r in rows], dtype=np.float64)
+        # NULL becomes NaN here
+        self.rating = np.array([r["rating"] for r in rows], dtype=np.float64)
+        self.response = np.array([r["avg_response_time_mins"] for r in rows], dtype=np.float64)
+        self.icu = np.array([r["icu_beds_available"] for r in rows], dtype=np.float64)
+        self.blood = {
+            col: np.array([r[col] or 0 for r in rows], dtype=np.int64)
+            for col in BLOOD_COLUMNS
+        }
+
+        self.embeddings = np.zeros((n, dim), dtype=np.float32)
+        # hospitals without an embedding sort last, like NULL in ORDER BY
+        self.has_embedding = np.zeros(n, dtype=bool)
+        for i, r in enumerate(rows):
+            if r["embedding"] is not None:
+                self.embeddings[i] = r["embedding"]
+                self.has_embedding[i] = True
+
+        # the static part of the score does not depend on the query; a NULL
+        # or zero rating makes the SQL score NULL, so those sort last here too
+        with np.errstate(divide="ignore"):
+            static = W_RESPONSE * self.response / 60.0 + W_RATING / self.rating
+        self.static_score = np.where(np.isfinite(static), static, np.inf)
+
+
+class RankingEngine:
+    """Scores a whole city in one vectorized pass; mirrors the SQL hybrid ranking."""
+
+    def __init__(self, rows):
+        dims = {len(r["embedding"]) for r in rows if r["embedding"] is not None}
+        self.dim = dims.pop() if dims else 0
+
+        by_city = {}
+        for r in rows:
+            if r["lat"] is None or r["lon"] is None:
+                continue
+            by_city.setdefault(r["city"], []).append(r)
+        self.cities = {city: CityBlock(rs, self.dim) for city, rs in by_city.items()}
+
+    @classmethod
+    def from_db(cls, conn):
+        cur = conn.cursor()
+        cur.execute(f"""
+        SELECT id, name, city, lat, lon, rating,
+               avg_response_time_mins, icu_beds_available,
+               {", ".join(BLOOD_COLUMNS)},
+               embedding::real[]
+        FROM hospitals;
+        """)
+        names = [d[0] for d in cur.description]
+        names[-1] = "embedding"
+        rows = [dict(zip(names, r)) for r in cur.fetchall()]
+        cur.close()
+        return cls(rows)
+
+    def rank(self, city, blood_col, query_embedding, user_lat, user_lon, k=5):
+        # rows shaped like the SQL path: name, rating, response, icu, blood, distance_km, id
+        block = self.cities.get(city)
+        if block is None:
+            return []
+
+        candidates = np.flatnonzero(block.blood[blood_col] > 0)
+        if len(candidates) == 0:
+            return []
+
+        # query_embedding=None drops the vector term, like NULL in hybrid_score_sql
+        if query_embedding is None:
+            vec_dist = np.zeros(len(candidates))
+        else:
+            q = np.asarray(query_embedding, dtype=np.float32)
+            diff = block.embeddings[candidates] - q
+            vec_dist = np.sqrt(np.einsum("ij,ij->i", diff, diff, dtype=np.float64))
+        vec_dist[~block.has_embedding[candidates]] = np.inf
+
+        km = haversine_km(user_lat, user_lon, block.lat[candidates], block.lon[candidates])
+        score = W_VECTOR * vec_dist + W_DISTANCE * km + block.static_score[candidates]
+
+        # ties (including every unscorable row) go to the nearest, as in SQL
+        top = np.lexsort((km, score))[:k]
+
+        blood = block.blood[blood_col]
+        out = []
+        for j in top:
+            i = candidates[j]
+            out.append((
+                block.names[i],
+                _nullable(block.rating[i], float),
+                _nullable(block.response[i], int),
+                _nullable(block.icu[i], int),
+                int(blood[i]),
+                float(km[j]),
+                block.ids[i],
+            ))
+        return out
+
+
+def _nullable(value, cast):
+    return None if np.isnan(value) else cast(value)
+
+
+# ---------------- SHARED INSTANCE ----------------
+_engine = None
+_engine_version = None
+_engine_lock = threading.Lock()
+
+
+def get_ranking_engine(connection):
+    # `connection` is a context manager factory such as DBPool.connection
+    global _engine, _engine_version
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                with connection() as conn:
+                    _engine_version = hospitals_version(conn)
+                    _engine = RankingEngine.from_db(conn)
+    return _engine
+
+
+def refresh_ranking_engine(connection):
+    # rebuilds only if it was ever built and hospitals (rows or embeddings)
+    # changed since; requests keep ranking against the old copy meanwhile
+    global _engine, _engine_version
+    with connection() as conn:
+        version = hospitals_version(conn)
+        if _engine is None or version == _engine_version:
+            return False
+        engine = RankingEngine.from_db(conn)
+    with _engine_lock:
+        _engine, _engine_version = engine, version
+    return True
+
+
+def reset_ranking_engine():
+    # call after hospital rows or embeddings change
+    global _engine
+    with _engine_lock:
+        _engine = None
+
+
+# ---------------- EMBEDDING SPACE ----------------
+# query vectors are only compared with hospital vectors from the same model
+_models = None
+_models_version = None
+_models_lock = threading.Lock()
+
+
+def embedding_models(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT DISTINCT embedding_model FROM hospitals WHERE embedding IS NOT NULL;")
+    models = {r[0] for r in cur.fetchall()}
+    cur.close()
+    return models
+
+
+def same_embedding_space(model, stored):
+    # rows embedded before embedding_model was recorded (NULL) are trusted;
+    # a table still being re-embedded with a new model matches neither
+    return all(m is None or m == model for m in stored)
+
+
+def get_embedding_models(connection):
+    global _models, _models_version
+    if _models is None:
+        with _models_lock:
+            if _models is None:
+                with connection() as conn:
+                    _models_version = hospitals_version(conn)
+                    _models = embedding_models(conn)
+    return _models
+
+
+def refresh_embedding_models(connection):
+    # like refresh_ranking_engine: only once loaded, and only after a change
+    global _models, _models_version
+    with connection() as conn:
+        version = hospitals_version(conn)
+        if _models is None or version == _models_version:
+            return False
+        models = embedding_models(conn)
+    with _models_lock:
+        _models, _models_version = models, version
+    return True
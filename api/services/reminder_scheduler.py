@@ -1,32 +1,60 @@
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import date
+from datetime import date, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from databases import SessionLocal
-from models import ThalassemiaProfile, User
-from services.email_service import send_email
-from services.sms_service import send_sms
+from models import ThalassemiaProfile, User, ReminderSent
+from services.notifications import enqueue
+
+REMINDER_WINDOW_DAYS = 2
 
 def check_reminders():
     db = SessionLocal()
-    today = date.today()
-
-    patients = db.query(ThalassemiaProfile).all()
-
-    for patient in patients:
-        days_left = (patient.next_due_date - today).days
-
-        if days_left <= 2:
-            user = db.query(User).filter(User.id == patient.user_id).first()
-
+    cutoff = date.today() + timedelta(days=REMINDER_WINDOW_DAYS)
+
+    try:
+        # claim due (or overdue) patients in the ledger and read their contact
+        # details in one statement; the ledger's primary key means an
+        # overlapping run claims nothing twice instead of failing on insert
+        claimed = (
+            insert(ReminderSent)
+            .from_select(
+                ["profile_id", "due_date"],
+                select(ThalassemiaProfile.id, ThalassemiaProfile.next_due_date)
+                .where(ThalassemiaProfile.next_due_date <= cutoff),
+            )
+            .on_conflict_do_nothing()
+            .returning(ReminderSent.profile_id, ReminderSent.due_date)
+            .cte("claimed")
+        )
+        due = db.execute(
+            select(User.email, User.phone, ThalassemiaProfile.full_name, claimed.c.due_date)
+            .join_from(claimed, ThalassemiaProfile, ThalassemiaProfile.id == claimed.c.profile_id)
+            .join(User, User.id == ThalassemiaProfile.user_id)
+        ).all()
+
+        messages = []
+        for email, phone, name, next_due in due:
             message = f"""
-            Hi {patient.full_name},
-            Your blood transfusion is due on {patient.next_due_date}.
+            Hi {name},
+            Your blood transfusion is due on {next_due}.
             Please schedule your hospital visit.
             """
-
-            send_email(user.email, "ThalCare Reminder", message)
-            send_sms(user.phone, message)
-
-    db.close()
+            messages.append(("email", email, "ThalCare Reminder", message))
+            messages.append(("sms", phone, None, message))
+
+        # queued in the same transaction as the claim; the API's outbox
+        # worker (api.services.notifications.Outbox) delivers and retries them
+        cur = db.connection().connection.cursor()
+        enqueue(cur, messages)
+        cur.close()
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 scheduler = BackgroundScheduler()
-scheduler.add_job(check_reminders, "interval", hours=24)
\ No newline at end of file
+scheduler.add_job(check_reminders, "interval", hours=24)
@@ -0,0 +1,234 @@
+import json
+import math
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180.0
+
+# ~11 km cells: a city spans a handful of cells, a k-NN query touches a few rings
+DEFAULT_CELL_DEG = 0.1
+
+
+def haversine_km(lat, lon, lats, lons):
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialIndex:
+    """Grid-bucketed hospital coordinates answering k-nearest and radius queries in memory."""
+
+    def __init__(self, ids, cities, lats, lons, cell_deg=DEFAULT_CELL_DEG):
+        self.ids = np.asarray(ids, dtype=object)
+        self.cities = np.asarray(cities, dtype=object)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_deg = cell_deg
+
+        cells = defaultdict(list)
+        for i, (ci, cj) in enumerate(zip(self._cell(self.lats), self._cell(self.lons))):
+            cells[(int(ci), int(cj))].append(i)
+        self.cells = {k: np.asarray(v, dtype=np.int64) for k, v in cells.items()}
+
+        by_city = defaultdict(list)
+        for i, city in enumerate(self.cities):
+            by_city[city].append(i)
+        self.by_city = {k: np.asarray(v, dtype=np.int64) for k, v in by_city.items()}
+
+        if self.cells:
+            keys = np.array(list(self.cells.keys()))
+            self._cell_min = keys.min(axis=0)
+            self._cell_max = keys.max(axis=0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------------- BUILD ----------------
+    @classmethod
+    def from_rows(cls, rows, cell_deg=DEFAULT_CELL_DEG):
+        # rows = (id, city, lat, lon)
+        rows = [r for r in rows if r[2] is not None and r[3] is not None]
+        ids = [str(r[0]) for r in rows]
+        cities = [r[1] for r in rows]
+        lats = [float(r[2]) for r in rows]
+        lons = [float(r[3]) for r in rows]
+        return cls(ids, cities, lats, lons, cell_deg=cell_deg)
+
+    @classmethod
+    def from_db(cls, conn, cell_deg=DEFAULT_CELL_DEG):
+        cur = conn.cursor()
+        cur.execute("SELECT id, city, lat, lon FROM hospitals;")
+        rows = cur.fetchall()
+        cur.close()
+        return cls.from_rows(rows, cell_deg=cell_deg)
+
+    @classmethod
+    def from_json(cls, path="data/processed_hospitals.json", cell_deg=DEFAULT_CELL_DEG):
+        with open(path, encoding="utf-8") as f:
+            records = json.load(f)
+        rows = [(r["id"], r.get("city"), r.get("lat"), r.get("lon")) for r in records]
+        return cls.from_rows(rows, cell_deg=cell_deg)
+
+    # ---------------- QUERIES ----------------
+    def distances(self, lat, lon, city):
+        # every hospital in the city with its distance, unordered
+        idx = self.by_city.get(city)
+        if idx is None:
+            return [], np.empty(0)
+        d = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        return list(self.ids[idx]), d
+
+    def nearest(self, lat, lon, k, city=None):
+        if city is not None:
+            idx = self.by_city.get(city, np.empty(0, dtype=np.int64))
+            return self._top_k(idx, haversine_km(lat, lon, self.lats[idx], self.lons[idx]), k)
+
+        if not self.cells:
+            return []
+
+        ci, cj = self._cell(lat), self._cell(lon)
+        max_ring = int(max(
+            abs(ci - self._cell_min[0]), abs(ci - self._cell_max[0]),
+            abs(cj - self._cell_min[1]), abs(cj - self._cell_max[1]),
+        ))
+
+        everything = np.arange(len(self.ids))
+        found = []
+        for ring in range(max_ring + 1):
+            # far from every bucket: walking empty rings costs more than a full scan
+            if 8 * ring > len(self.cells):
+                return self._top_k(everything, haversine_km(lat, lon, self.lats, self.lons), k)
+            found.extend(self._ring(ci, cj, ring))
+            if sum(len(b) for b in found) < k:
+                continue
+            idx = np.concatenate(found)
+            d = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+            kth = np.partition(d, k - 1)[k - 1]
+            # anything outside this ring is at least `ring` whole cells away
+            if kth <= self._ring_clearance_km(lat, ring):
+                return self._top_k(idx, d, k)
+
+        return self._top_k(everything, haversine_km(lat, lon, self.lats, self.lons), k)
+
+    def within(self, lat, lon, radius_km, city=None):
+        if city is not None:
+            idx = self.by_city.get(city, np.empty(0, dtype=np.int64))
+        else:
+            idx = self._bbox(lat, lon, radius_km)
+
+        d = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        keep = d <= radius_km
+        idx, d = idx[keep], d[keep]
+        order = np.argsort(d, kind="stable")
+        return [(self.ids[i], float(x)) for i, x in zip(idx[order], d[order])]
+
+    # ---------------- HELPERS ----------------
+    def _cell(self, deg):
+        return np.floor(np.asarray(deg) / self.cell_deg).astype(np.int64)
+
+    def _ring(self, ci, cj, ring):
+        if ring == 0:
+            keys = [(ci, cj)]
+        else:
+            keys = []
+            for d in range(-ring, ring + 1):
+                keys += [(ci - ring, cj + d), (ci + ring, cj + d)]
+            for d in range(-ring + 1, ring):
+                keys += [(ci + d, cj - ring), (ci + d, cj + ring)]
+        out = []
+        for i, j in keys:
+            bucket = self.cells.get((int(i), int(j)))
+            if bucket is not None:
+                out.append(bucket)
+        return out
+
+    def _ring_clearance_km(self, lat, ring):
+        gap_deg = ring * self.cell_deg
+        far_lat = min(abs(lat) + gap_deg, 89.9)
+        return gap_deg * KM_PER_DEG * math.cos(math.radians(far_lat))
+
+    def _bbox(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEG
+        far_lat = min(abs(lat) + dlat, 89.9)
+        dlon = radius_km / (KM_PER_DEG * math.cos(math.radians(far_lat)))
+
+        i0, i1 = int(self._cell(lat - dlat)), int(self._cell(lat + dlat))
+        j0, j1 = int(self._cell(lon - dlon)), int(self._cell(lon + dlon))
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self.cells):
+            return np.arange(len(self.ids))
+
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                bucket = self.cells.get((i, j))
+                if bucket is not None:
+                    found.append(bucket)
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _top_k(self, idx, d, k):
+        if len(idx) > k:
+            part = np.argpartition(d, k - 1)[:k]
+            idx, d = idx[part], d[part]
+        order = np.argsort(d, kind="stable")
+        return [(self.ids[i], float(x)) for i, x in zip(idx[order], d[order])]
+
+
+# ---------------- SHARED INSTANCE ----------------
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def hospitals_version(conn):
+    # bumped by every insert, update or delete on hospitals, from any process;
+    # backends report their counts a second or so after commit
+    cur = conn.cursor()
+    cur.execute("""
+    SELECT n_tup_ins + n_tup_upd + n_tup_del
+    FROM pg_stat_user_tables
+    WHERE relid = 'hospitals'::regclass;
+    """)
+    row = cur.fetchone()
+    cur.close()
+    # statistics are snapshotted per transaction; end it so the next poll is fresh
+    conn.rollback()
+    return row[0] if row else None
+
+
+def get_spatial_index(connection):
+    # `connection` is a context manager factory such as DBPool.connection
+    global _index, _index_version
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                with connection() as conn:
+                    _index_version = hospitals_version(conn)
+                    _index = SpatialIndex.from_db(conn)
+    return _index
+
+
+def refresh_spatial_index(connection):
+    # rebuilds only if hospitals changed since the last build (e.g. after
+    # scripts/load_hospitals.py); requests keep using the old index meanwhile
+    global _index, _index_version
+    with connection() as conn:
+        version = hospitals_version(conn)
+        if _index is None or version == _index_version:
+            return False
+        index = SpatialIndex.from_db(conn)
+    with _index_lock:
+        _index, _index_version = index, version
+    return True
+
+
+def reset_spatial_index():
+    # call after hospitals are inserted, moved or deleted
+    global _index
+    with _index_lock:
+        _index = None
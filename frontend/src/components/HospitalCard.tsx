@@ -7,6 +7,7 @@ interface Hospital {
   icu: number;
   blood: number;
   distance: number;
+  explanation?: string;
 }
 
 interface HospitalCardProps {
@@ -54,6 +55,9 @@ const HospitalCard = ({ hospital, onSelect }: HospitalCardProps) => {
         </div>
       </div>
 
+      {hospital.explanation && (
+        <p className="text-sm text-gray-700 mb-4">{hospital.explanation}</p>
+      )}
 
       {onSelect && (
         <button
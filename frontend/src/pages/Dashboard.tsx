@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
-import api from '../services/api';
+import { postEventStream } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 import Loader from '../components/Loader';
 import HospitalCard from '../components/HospitalCard';
@@ -13,6 +13,7 @@ interface Hospital {
   icu: number;
   blood: number;
   distance: number;
+  explanation?: string;
 }
 
 const Dashboard = () => {
@@ -54,16 +55,33 @@ const Dashboard = () => {
     setError('');
     setHospitals([]);
     try {
-      const resp = await api.post('/recommend', {
-        city: searchCity,
-        blood_type: searchBlood,
-        query: searchQuery,
-        user_lat: userLat,
-        user_lon: userLon,
-      });
-      const list: Hospital[] = resp.data.recommendations || [];
-      setHospitals(list);
-      if (list.length === 0) {
+      // results render as soon as the ranking is ready; explanations fill in after
+      let count = 0;
+      await postEventStream(
+        '/recommend/stream',
+        {
+          city: searchCity,
+          blood_type: searchBlood,
+          query: searchQuery,
+          user_lat: userLat,
+          user_lon: userLon,
+        },
+        (event, data) => {
+          if (event === 'recommendations') {
+            const list: Hospital[] = data.recommendations || [];
+            count = list.length;
+            setHospitals(list);
+            setLoading(false);
+          } else if (event === 'explanation') {
+            setHospitals((prev) =>
+              prev.map((h, idx) =>
+                idx === data.index ? { ...h, explanation: data.explanation } : h
+              )
+            );
+          }
+        }
+      );
+      if (count === 0) {
         setError('No hospitals found. Try another search.');
       }
     } catch (err: any) {
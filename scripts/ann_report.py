@@ -0,0 +1,107 @@
+import os
+import time
+import psycopg2
+import pandas as pd
+
+from api.services.ann_index import (
+    build_ann_index, drop_ann_index, ann_search, exact_search, pgvector_version
+)
+from api.services.embedding_cache import WARMUP_PHRASES as QUERIES
+from scripts.hybrid_search import DB, embed
+
+# ---------------- CONFIG ----------------
+
+K = 5
+METHOD = os.getenv("ANN_METHOD", "hnsw")
+
+# build parameters
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))
+IVFFLAT_LISTS = int(os.getenv("IVFFLAT_LISTS", "100"))
+
+# search parameters swept by the report
+EF_SEARCH = [10, 20, 40, 80, 160]
+PROBES = [1, 5, 10, 20, 50]
+
+FILTERS = {
+    "global": (None, None),
+    "city": ("Delhi", None),
+    "city+blood": ("Delhi", "blood_o_neg"),
+}
+
+# ---------------- HELPERS ----------------
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    rows = fn(*args, **kwargs)
+    return rows, (time.perf_counter() - start) * 1000
+
+def summarize(latencies):
+    s = pd.Series(latencies)
+    return round(s.quantile(0.5), 2), round(s.quantile(0.95), 2)
+
+# ---------------- MAIN ----------------
+
+conn = psycopg2.connect(**DB)
+# looked up once here so no timed search pays for it
+pgvector_version(conn)
+
+print(f"Building {METHOD} index...")
+start = time.perf_counter()
+build_ann_index(conn, METHOD, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, lists=IVFFLAT_LISTS)
+build_secs = round(time.perf_counter() - start, 2)
+
+embeddings = {q: embed(q) for q in QUERIES}
+
+# exact ground truth per query x filter
+truth = {}
+exact_lat = {name: [] for name in FILTERS}
+for name, (city, blood_col) in FILTERS.items():
+    for q, q_emb in embeddings.items():
+        rows, ms = timed(exact_search, conn, q_emb, K, city, blood_col)
+        truth[(name, q)] = {r[0] for r in rows}
+        exact_lat[name].append(ms)
+
+results = []
+for name in FILTERS:
+    p50, p95 = summarize(exact_lat[name])
+    results.append({
+        "Method": "exact", "Filter": name, "Param": "-",
+        "Recall@5": 1.0, "p50(ms)": p50, "p95(ms)": p95,
+    })
+
+sweep = EF_SEARCH if METHOD == "hnsw" else PROBES
+for value in sweep:
+    for name, (city, blood_col) in FILTERS.items():
+        recalls, latencies = [], []
+        for q, q_emb in embeddings.items():
+            rows, ms = timed(
+                ann_search, conn, q_emb, K, city, blood_col,
+                ef_search=value, probes=value
+            )
+            expected = truth[(name, q)]
+            got = {r[0] for r in rows}
+            recalls.append(len(got & expected) / len(expected) if expected else 1.0)
+            latencies.append(ms)
+
+        p50, p95 = summarize(latencies)
+        results.append({
+            "Method": METHOD,
+            "Filter": name,
+            "Param": f"{'ef_search' if METHOD == 'hnsw' else 'probes'}={value}",
+            "Recall@5": round(sum(recalls) / len(recalls), 3),
+            "p50(ms)": p50,
+            "p95(ms)": p95,
+        })
+
+if os.getenv("ANN_KEEP_INDEX", "1") != "1":
+    drop_ann_index(conn)
+
+conn.close()
+
+df = pd.DataFrame(results)
+df.to_csv(f"ann_recall_{METHOD}.csv", index=False)
+
+print(f"\nIndex build: {build_secs}s\n")
+print("RECALL vs LATENCY:\n")
+print(df.to_string(index=False))
@@ -0,0 +1,86 @@
+import os
+import time
+import asyncio
+import httpx
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ---------------- CONFIG ----------------
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "200"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+
+PAYLOAD = {
+    "city": "Delhi",
+    "blood_type": "blood_o_pos",
+    "query": "road accident O+ blood",
+    "user_lat": 28.6139,
+    "user_lon": 77.2090
+}
+
+PATHS = {
+    "sync": "/recommend",
+    "async": "/async/recommend",
+}
+
+# ---------------- LOAD GENERATOR ----------------
+
+async def run(path):
+    sem = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    errors = 0
+
+    async with httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=300,
+        limits=httpx.Limits(max_connections=CONCURRENCY)
+    ) as client:
+
+        async def one():
+            nonlocal errors
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    r = await client.post(path, json=PAYLOAD)
+                    r.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        elapsed = time.perf_counter() - start
+
+    s = pd.Series(latencies) * 1000
+    return {
+        "Path": path,
+        "Requests": REQUESTS,
+        "Concurrency": CONCURRENCY,
+        "Errors": errors,
+        "Throughput(req/s)": round(len(latencies) / elapsed, 2),
+        "p50(ms)": round(s.quantile(0.5), 1) if len(s) else None,
+        "p95(ms)": round(s.quantile(0.95), 1) if len(s) else None,
+        "p99(ms)": round(s.quantile(0.99), 1) if len(s) else None,
+    }
+
+# ---------------- MAIN ----------------
+
+async def main():
+    results = []
+    for name, path in PATHS.items():
+        print(f"Benchmarking {name} path ({path})...")
+        results.append(await run(path))
+
+    df = pd.DataFrame(results)
+    df.to_csv("async_benchmark.csv", index=False)
+
+    print("\nTHROUGHPUT:\n")
+    print(df.to_string(index=False))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import tempfile
+import pandas as pd
+
+from scripts.fake_overpass import FakeOverpass
+from scripts.fetch_osm_data import DEFAULT_CITIES, RATE as OSM_RATE, OverpassFetcher, snapshot, diff
+
+# Refreshes DEFAULT_CITIES plus BENCH_EXTRA_CITIES synthetic ones against a
+# local fake Overpass: a cold fetch, a warm run inside the cache TTL, a
+# revalidation where nothing changed, and one after a few cities were
+# edited. The old loop slept 5 s per city on top of each request.
+#
+# BENCH_RATE defaults to the shipped OSM_RATE, so the times are what a real
+# refresh takes; "Floor(s)" is the wait the rate alone imposes on that run.
+
+# ---------------- CONFIG ----------------
+
+EXTRA = int(os.getenv("BENCH_EXTRA_CITIES", "50"))
+RATE = float(os.getenv("BENCH_RATE", str(OSM_RATE)))
+WORKERS = int(os.getenv("BENCH_WORKERS", "4"))
+LATENCY = float(os.getenv("OVERPASS_RTT_MS", "200")) / 1000
+EDITED = 3
+
+CITIES = DEFAULT_CITIES + [f"Town {i}" for i in range(EXTRA)]
+
+# ---------------- RUN ----------------
+
+def run(label, server, cache_dir, previous, ttl):
+    fetcher = OverpassFetcher(server.url, cache_dir, rate=RATE, workers=WORKERS, ttl=ttl)
+    before = server.requests
+
+    start = time.perf_counter()
+    elements = snapshot(fetcher.fetch_all(CITIES))
+    elapsed = time.perf_counter() - start
+
+    new, changed, removed = diff(previous, elements)
+    with open(previous, "w", encoding="utf-8") as f:
+        json.dump(elements, f)
+
+    c = fetcher.counts
+    requests = server.requests - before
+    return {
+        "Run": label,
+        "Time(s)": round(elapsed, 2),
+        "Floor(s)": round(max(requests - 1, 0) / RATE, 2),
+        "Requests": requests,
+        "Downloaded": c["downloaded"],
+        "NotModified": c["not_modified"],
+        "Cached": c["cached"],
+        "New": len(new),
+        "Changed": len(changed),
+        "Removed": len(removed),
+    }
+
+# ---------------- MAIN ----------------
+
+server = FakeOverpass(latency=LATENCY).start()
+
+with tempfile.TemporaryDirectory() as tmp:
+    cache_dir = os.path.join(tmp, "cache")
+    previous = os.path.join(tmp, "raw_osm_data.json")
+
+    results = [
+        run("cold", server, cache_dir, previous, ttl=3600),
+        run("warm (within TTL)", server, cache_dir, previous, ttl=3600),
+        run("revalidate, unchanged", server, cache_dir, previous, ttl=0),
+    ]
+    for city in CITIES[:EDITED]:
+        server.edit(city)
+    results.append(run(f"revalidate, {EDITED} cities edited", server, cache_dir, previous, ttl=0))
+
+server.shutdown()
+
+df = pd.DataFrame(results)
+print(f"\n{len(CITIES)} cities, {WORKERS} workers, {RATE:g} req/s, {LATENCY * 1000:.0f} ms per reply; "
+      f"the old sequential loop needs over {len(CITIES) * 5} s\n")
+print(df.to_string(index=False))
+print(f"\nserver rejections (429): {server.rejected}")
@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+import httpx
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Fires a login burst at a running API and, alongside it, a trickle of
+# /recommend calls to check that hashing load does not starve search.
+
+# ---------------- CONFIG ----------------
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+
+LOGINS = int(os.getenv("BENCH_LOGINS", "200"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "50"))
+
+USER = {
+    "email": "login-benchmark@thalcare.local",
+    "password": "benchmark-password",
+    "phone": "0000000000",
+    "role": "donor",
+}
+
+PROBE = {
+    "city": "Delhi",
+    "blood_type": "blood_o_pos",
+    "query": "road accident O+ blood",
+    "user_lat": 28.6139,
+    "user_lon": 77.2090
+}
+
+PATHS = {
+    "sync": "/login",
+    "async": "/async/login",
+}
+
+# ---------------- LOAD GENERATOR ----------------
+
+def ms(values):
+    s = pd.Series(values) * 1000
+    if not len(s):
+        return None, None, None
+    return tuple(round(s.quantile(q), 1) for q in (0.5, 0.95, 0.99))
+
+async def run(client, path):
+    sem = asyncio.Semaphore(CONCURRENCY)
+    latencies, probe_latencies = [], []
+    shed = errors = 0
+    done = asyncio.Event()
+
+    async def one():
+        nonlocal shed, errors
+        async with sem:
+            start = time.perf_counter()
+            try:
+                r = await client.post(path, json={"email": USER["email"], "password": USER["password"]})
+            except httpx.HTTPError:
+                errors += 1
+                return
+            if r.status_code == 503:
+                shed += 1
+            elif r.status_code != 200 or "access_token" not in r.json():
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            try:
+                r = await client.post("/recommend", json=PROBE)
+                if r.status_code == 200:
+                    probe_latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+
+    probe_task = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    p50, p95, p99 = ms(latencies)
+    probe_p50, probe_p95, _ = ms(probe_latencies)
+    return {
+        "Path": path,
+        "Logins": LOGINS,
+        "Concurrency": CONCURRENCY,
+        "OK": len(latencies),
+        "Shed(503)": shed,
+        "Errors": errors,
+        "Throughput(login/s)": round(len(latencies) / elapsed, 2),
+        "p50(ms)": p50,
+        "p95(ms)": p95,
+        "p99(ms)": p99,
+        "Recommend p50(ms)": probe_p50,
+        "Recommend p95(ms)": probe_p95,
+    }
+
+# ---------------- MAIN ----------------
+
+async def main():
+    async with httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=300,
+        limits=httpx.Limits(max_connections=CONCURRENCY + 1)
+    ) as client:
+        # no-op error if the benchmark user already exists
+        await client.post("/register", json=USER)
+
+        results = []
+        for name, path in PATHS.items():
+            print(f"Benchmarking {name} login ({path})...")
+            results.append(await run(client, path))
+
+    df = pd.DataFrame(results)
+    df.to_csv("login_benchmark.csv", index=False)
+
+    print("\nLOGIN THROUGHPUT:\n")
+    print(df.to_string(index=False))
+
+if __name__ == "__main__":
+    asyncio.run(main())
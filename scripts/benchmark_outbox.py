@@ -0,0 +1,118 @@
+import os
+import time
+import pandas as pd
+from psycopg2.extras import execute_values
+
+import psycopg2
+
+from api.migrations import MIGRATIONS
+from api.services.db_pool import DBPool
+from api.services.notifications import Outbox, StubProvider, ENQUEUE_SQL
+from scripts.hybrid_search import DB
+
+# Drains the notification outbox against stub providers, so throughput,
+# rate limiting and retry behaviour can be measured with no SMTP / Twilio.
+# Runs against a copy of the outbox table in a scratch schema, so real
+# queued reminders are neither drained nor deleted.
+
+# ---------------- CONFIG ----------------
+
+MESSAGES = int(os.getenv("BENCH_MESSAGES", "500"))
+WORKERS = [1, 4, 8, 16]
+
+PROVIDER_LATENCY = float(os.getenv("STUB_LATENCY_SECONDS", "0.05"))
+FAILURE_RATE = float(os.getenv("STUB_FAILURE_RATE", "0.1"))
+
+# 0 disables the bucket for that channel
+EMAIL_RATE = float(os.getenv("EMAIL_RATE_PER_SEC", "0"))
+SMS_RATE = float(os.getenv("SMS_RATE_PER_SEC", "0"))
+
+BENCH_SCHEMA = "outbox_benchmark"
+BENCH_SUBJECT = "outbox-benchmark"
+
+# ---------------- HELPERS ----------------
+
+def create_schema():
+    # the real migration, run with only the scratch schema on the search path
+    conn = psycopg2.connect(**DB)
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+    cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA};")
+    cur.execute(f"SET search_path TO {BENCH_SCHEMA};")
+    cur.execute(dict(MIGRATIONS)["005_notification_outbox"])
+    conn.commit()
+    cur.close()
+    conn.close()
+
+def drop_schema():
+    conn = psycopg2.connect(**DB)
+    cur = conn.cursor()
+    cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+    conn.commit()
+    cur.close()
+    conn.close()
+
+def reset(pool):
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM notification_outbox WHERE subject = %s;", (BENCH_SUBJECT,))
+        conn.commit()
+        cur.close()
+
+def fill(pool):
+    rows = [
+        ("email" if i % 2 == 0 else "sms", f"user{i}@example.com", BENCH_SUBJECT, "benchmark")
+        for i in range(MESSAGES)
+    ]
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        execute_values(cur, ENQUEUE_SQL, rows)
+        conn.commit()
+        cur.close()
+
+# ---------------- MAIN ----------------
+
+create_schema()
+# every pooled connection, including the Outbox's, sees only the scratch table
+pool = DBPool({**DB, "options": f"-c search_path={BENCH_SCHEMA}"}, minconn=1, maxconn=4)
+
+results = []
+for workers in WORKERS:
+    reset(pool)
+    fill(pool)
+
+    outbox = Outbox(
+        pool.connection,
+        {
+            "email": StubProvider(PROVIDER_LATENCY, FAILURE_RATE, seed=1),
+            "sms": StubProvider(PROVIDER_LATENCY, FAILURE_RATE, seed=2),
+        },
+        rate_limits={"email": EMAIL_RATE, "sms": SMS_RATE},
+        workers=workers,
+        max_attempts=3,
+        base_delay=0,
+    )
+
+    start = time.perf_counter()
+    totals = outbox.drain()
+    elapsed = time.perf_counter() - start
+    outbox.close()
+
+    results.append({
+        "Workers": workers,
+        "Messages": MESSAGES,
+        "Sent": totals["sent"],
+        "Retries": totals["retry"],
+        "Dead": totals["dead"],
+        "Seconds": round(elapsed, 2),
+        "Msgs/sec": round(totals["sent"] / elapsed, 1),
+    })
+
+pool.closeall()
+drop_schema()
+
+df = pd.DataFrame(results)
+df.to_csv("outbox_benchmark.csv", index=False)
+
+print("\nOUTBOX THROUGHPUT (stub providers):\n")
+print(df.to_string(index=False))
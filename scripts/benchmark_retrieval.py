@@ -0,0 +1,100 @@
+import os
+import time
+import pandas as pd
+import psycopg2
+
+from api.services.embedders import HashingEmbedder
+from api.services.embedding_cache import WARMUP_PHRASES as QUERIES
+from api.services.ranking_engine import RankingEngine
+from scripts.hybrid_search import DB
+from scripts.retrieval_systems import SYSTEMS, CITY_CENTRES, K, score_runs
+
+# Runs every retrieval system over a query x location grid and writes
+# evaluation.csv (quality, latency percentiles, throughput) for
+# plot_systems.py. Offline: needs only the local Postgres; queries are
+# embedded with a deterministic hashing stand-in sized to the stored vectors,
+# so the hospitals must have been embedded with it too (checked below).
+
+# ---------------- CONFIG ----------------
+
+CITIES = [c for c in os.getenv("BENCH_CITIES", ",".join(CITY_CENTRES)).split(",") if c]
+BLOOD_COL = os.getenv("BENCH_BLOOD", "blood_o_pos")
+REPEATS = int(os.getenv("BENCH_REPEATS", "3"))
+
+# ---------------- IN-MEMORY SYSTEM ----------------
+
+def numpy_hybrid(engine):
+    def search(cur, q_emb, city, lat, lon, blood_col=BLOOD_COL, k=K):
+        rows = engine.rank(city, blood_col, q_emb, lat, lon, k)
+        # name, rating, response, icu, blood, distance, id -> shared row shape
+        return [(r[0], r[1], r[3], r[4], r[5]) for r in rows]
+    return search
+
+# ---------------- MAIN ----------------
+
+conn = psycopg2.connect(**DB)
+cur = conn.cursor()
+
+cur.execute("""
+SELECT DISTINCT embedding_model, vector_dims(embedding)
+FROM hospitals WHERE embedding IS NOT NULL;
+""")
+stored = cur.fetchall()
+if not stored:
+    raise SystemExit("No hospital embeddings found; run scripts/embed_hospitals.py first")
+dim = stored[0][1]
+
+# query vectors only mean something against hospital vectors from the same model
+embedder = HashingEmbedder(dim)
+if stored != [(embedder.model, dim)]:
+    found = ", ".join(f"{m or 'unknown'} ({d}d)" for m, d in stored)
+    raise SystemExit(
+        f"Hospital embeddings come from {found}, not {embedder.model}; re-embed with "
+        f"EMBED_BACKEND=hashing EMBED_DIM={dim} python -m scripts.embed_hospitals"
+    )
+
+systems = dict(SYSTEMS)
+systems["Hybrid (NumPy)"] = numpy_hybrid(RankingEngine.from_db(conn))
+
+embeddings = {q: embedder.embed(q) for q in QUERIES}
+grid = [(q, city, *CITY_CENTRES[city]) for q in QUERIES for city in CITIES]
+
+results = []
+for name, search in systems.items():
+    # warm plans and caches before timing
+    q, city, lat, lon = grid[0]
+    search(cur, embeddings[q], city, lat, lon, BLOOD_COL)
+
+    runs, latencies = [], []
+    for q, city, lat, lon in grid:
+        for i in range(REPEATS):
+            start = time.perf_counter()
+            rows = search(cur, embeddings[q], city, lat, lon, BLOOD_COL)
+            latencies.append(time.perf_counter() - start)
+        runs.append(rows)
+    conn.rollback()
+
+    m = score_runs(runs)
+    s = pd.Series(latencies) * 1000
+    results.append({
+        "System": name,
+        "Queries": len(grid),
+        "Precision@5": round(m["Precision@5"], 3),
+        "MRR": round(m["MRR"], 3),
+        "NDCG@5": round(m["NDCG@5"], 3),
+        "AvgDistance(km)": round(m["AvgDistance"], 2) if m["AvgDistance"] is not None else None,
+        "Latency": round(s.mean(), 2),
+        "p50(ms)": round(s.quantile(0.5), 2),
+        "p95(ms)": round(s.quantile(0.95), 2),
+        "p99(ms)": round(s.quantile(0.99), 2),
+        "Throughput(q/s)": round(len(latencies) / (s.sum() / 1000), 1),
+    })
+
+cur.close()
+conn.close()
+
+df = pd.DataFrame(results)
+df.to_csv("evaluation.csv", index=False)
+
+print(f"\n{len(grid)} queries x {REPEATS} repeats, {BLOOD_COL}; Latency is the mean in ms\n")
+print(df.to_string(index=False))
@@ -0,0 +1,102 @@
+import os
+import time
+import threading
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from api.services.notifications import SMTPProvider
+
+# Compares a fresh SMTP session per message (the old send_email) with pooled
+# sessions, against a local sink. The sink delays every reply by SINK_RTT_MS
+# to stand in for the network round trips of a real provider; TLS itself is
+# not modelled, so real-world savings from reuse are larger than shown.
+
+# ---------------- CONFIG ----------------
+
+EMAILS = int(os.getenv("BENCH_EMAILS", "1000"))
+RTT = float(os.getenv("SINK_RTT_MS", "5")) / 1000
+WORKERS = [1, 4, 8]
+
+# ---------------- SMTP SINK ----------------
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    delivered = 0
+    lock = threading.Lock()
+
+    def reply(self, line):
+        time.sleep(RTT)
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors="replace").strip().upper()
+
+            if cmd.startswith(("EHLO", "HELO")):
+                self.reply("250 sink")
+            elif cmd == "DATA":
+                self.reply("354 end with <CRLF>.<CRLF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with SinkHandler.lock:
+                    SinkHandler.delivered += 1
+                self.reply("250 queued")
+            elif cmd == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 ok")
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+# ---------------- RUN ----------------
+
+def run(label, max_messages, workers):
+    sender = SMTPProvider(
+        host, port, None, None, sender="reminders@thalcare.local",
+        starttls=False, max_messages=max_messages
+    )
+    SinkHandler.delivered = 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(
+            lambda i: sender.send(f"patient{i}@example.com", "ThalCare Reminder", "benchmark"),
+            range(EMAILS)
+        ))
+    elapsed = time.perf_counter() - start
+    sender.close()
+
+    return {
+        "Mode": label,
+        "Workers": workers,
+        "Emails": SinkHandler.delivered,
+        "Connections": sender.connects,
+        "Seconds": round(elapsed, 2),
+        "Emails/sec": round(EMAILS / elapsed, 1),
+    }
+
+server = SinkServer(("127.0.0.1", 0), SinkHandler)
+host, port = server.server_address
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+results = []
+for workers in WORKERS:
+    results.append(run("session per email", 1, workers))
+    results.append(run("pooled session", 100, workers))
+
+server.shutdown()
+
+df = pd.DataFrame(results)
+df.to_csv("smtp_benchmark.csv", index=False)
+
+print(f"\nSMTP THROUGHPUT ({EMAILS} emails, {RTT * 1000:.0f} ms per reply):\n")
+print(df.to_string(index=False))
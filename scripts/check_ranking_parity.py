@@ -0,0 +1,110 @@
+import sys
+import asyncio
+import psycopg2
+
+from api.services.blood_types import BLOOD_COLUMNS
+from api.services.ranking_engine import RankingEngine
+from scripts.hybrid_search import DB, embed, hybrid_search
+from api.services.embedding_cache import WARMUP_PHRASES as QUERIES
+import api.main as api
+
+# ---------------- CONFIG ----------------
+
+LOCATIONS = {
+    "Delhi": (28.6139, 77.2090),
+    "Mumbai": (19.0760, 72.8777),
+    "Bangalore": (12.9716, 77.5946),
+    "Kolkata": (22.5726, 88.3639),
+}
+K = 5
+
+# ---------------- PARITY ----------------
+# Every ranking path must return exactly the rows the reference SQL in
+# scripts/hybrid_search.py returns, in the same order, for every
+# query x city x blood column: the NumPy engine on its own, and the API's
+# sync search under both RANKING_ENGINE settings, the async search and the
+# batch endpoint.
+# Query vectors come from the configured embedder on every path, so use a
+# deterministic one (EMBED_BACKEND=hashing with a matching embed_hospitals run).
+
+def api_sync(engine):
+    def search(city, blood_col, q, lat, lon):
+        api.RANKING_ENGINE = engine
+        return api.hybrid_search(city, blood_col, q, lat, lon)
+    return search
+
+async def api_async_all(cases, engine):
+    api.RANKING_ENGINE = engine
+    results = []
+    for city, blood_col, q, lat, lon in cases:
+        results.append(await api.hybrid_search_async(city, blood_col, q, lat, lon))
+    await api.async_db.close()
+    await api.async_http.close()
+    return results
+
+def api_batch(cases):
+    reqs = [
+        api.SearchRequest(city=city, blood_type=blood_col, query=q, user_lat=lat, user_lon=lon)
+        for city, blood_col, q, lat, lon in cases
+    ]
+    results = []
+    for i in range(0, len(reqs), api.BATCH_MAX_ITEMS):
+        results += api.hybrid_search_batch(reqs[i:i + api.BATCH_MAX_ITEMS])
+    return results
+
+def as_rows(hospitals):
+    # API dicts -> (name, distance) like the reference rows
+    return [(h["name"], h["distance"]) for h in hospitals]
+
+conn = psycopg2.connect(**DB)
+engine = RankingEngine.from_db(conn)
+conn.close()
+
+cases = [
+    (city, blood_col, q, lat, lon)
+    for q in QUERIES
+    for city, (lat, lon) in LOCATIONS.items()
+    for blood_col in BLOOD_COLUMNS
+]
+
+paths = {
+    "numpy engine": [],
+    "api sql": [as_rows(api_sync("sql")(*c)) for c in cases],
+    "api numpy": [as_rows(api_sync("numpy")(*c)) for c in cases],
+    "api async sql": [as_rows(h) for h in asyncio.run(api_async_all(cases, "sql"))],
+    "api async numpy": [as_rows(h) for h in asyncio.run(api_async_all(cases, "numpy"))],
+    "api batch": [as_rows(h) for h in api_batch(cases)],
+}
+
+reference = []
+embeddings = {}
+for city, blood_col, q, lat, lon in cases:
+    if q not in embeddings:
+        embeddings[q] = embed(q)
+    q_emb = embeddings[q]
+    rows = hybrid_search(city, blood_col, q, lat, lon, limit=K, query_embedding=q_emb)
+    reference.append([(r[0], r[5]) for r in rows])
+    paths["numpy engine"].append(
+        [(r[0], r[5]) for r in engine.rank(city, blood_col, q_emb, lat, lon, k=K)]
+    )
+
+checked = 0
+mismatches = 0
+
+for name, results in paths.items():
+    for case, expected, got in zip(cases, reference, results):
+        # the API rounds distances to 2 decimals
+        same = [a[0] for a in expected] == [b[0] for b in got] and all(
+            abs(a[1] - b[1]) < 0.006 for a, b in zip(expected, got)
+        )
+
+        checked += 1
+        if not same:
+            mismatches += 1
+            city, blood_col, q = case[:3]
+            print(f"MISMATCH [{name}] {q!r} {city} {blood_col}")
+            print(f"  reference: {[a[0] for a in expected]}")
+            print(f"  {name}: {[b[0] for b in got]}")
+
+print(f"\n{checked - mismatches}/{checked} rankings identical across {len(paths)} paths")
+sys.exit(1 if mismatches else 0)
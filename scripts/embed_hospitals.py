@@ -1,13 +1,14 @@
 import os
+import hashlib
 import psycopg2
-import requests
+from psycopg2.extras import execute_values
 from tqdm import tqdm
 from dotenv import load_dotenv
 
-load_dotenv()
+from api.migrations import migrate
+from api.services.embedders import embedder_from_env
 
-OLLAMA_URL = os.getenv("OLLAMA_URL")
-MODEL = os.getenv("OLLAMA_MODEL")
+load_dotenv()
 
 DB = {
     "dbname": os.getenv("DB_NAME"),
@@ -17,57 +18,90 @@ DB = {
     "port": int(os.getenv("DB_PORT")),
 }
 
+BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "200"))
+
+# EMBED_BACKEND picks the model; EMBED_WORKERS sets Ollama request concurrency
+embedder = embedder_from_env()
+
+def hospital_text(row):
+    (
+        hid, name, city, trauma, rating,
+        response, icu,
+        o, a, b, ab
+    ) = row
+
+    return f"""
+Hospital name: {name}
+City: {city}
+Trauma level: {trauma}
+Rating: {rating}
+Average response time: {response} minutes
+ICU beds available: {icu}
+Blood availability: O+ {o}, A+ {a}, B+ {b}, AB+ {ab}
+"""
 
-def get_embedding(text):
-    payload = {
-        "model": MODEL,
-        "prompt": text
-    }
-    r = requests.post(OLLAMA_URL, json=payload, timeout=60)
-    r.raise_for_status()
-    return r.json()["embedding"]
+def content_hash(text, model):
+    # model is part of the hash so switching models re-embeds everything
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+def write_batch(cur, batch):
+    execute_values(cur, """
+        UPDATE hospitals AS h
+        SET embedding = v.embedding::vector,
+            embedding_hash = v.embedding_hash,
+            embedding_model = v.embedding_model,
+            embedding_dim = v.embedding_dim
+        FROM (VALUES %s) AS v(id, embedding, embedding_hash, embedding_model, embedding_dim)
+        WHERE h.id::text = v.id
+    """, batch)
 
 def main():
     conn = psycopg2.connect(**DB)
     cur = conn.cursor()
 
+    migrate(conn)
+
     cur.execute("""
         SELECT id, name, city, trauma_level, rating,
                avg_response_time_mins,
                icu_beds_available,
-               blood_o_pos, blood_a_pos, blood_b_pos, blood_ab_pos
+               blood_o_pos, blood_a_pos, blood_b_pos, blood_ab_pos,
+               embedding_hash,
+               embedding IS NOT NULL
         FROM hospitals
     """)
 
     rows = cur.fetchall()
 
-    print(f"Embedding {len(rows)} hospitals...")
-
-    for row in tqdm(rows):
-        (
-            hid, name, city, trauma, rating,
-            response, icu,
-            o, a, b, ab
-        ) = row
-
-        text = f"""
-Hospital name: {name}
-City: {city}
-Trauma level: {trauma}
-Rating: {rating}
-Average response time: {response} minutes
-ICU beds available: {icu}
-Blood availability: O+ {o}, A+ {a}, B+ {b}, AB+ {ab}
-"""
-
-        emb = get_embedding(text)
-
-        cur.execute(
-            "UPDATE hospitals SET embedding = %s WHERE id = %s",
-            (emb, hid)
-        )
+    # only hospitals whose embedding text changed (or never got embedded)
+    todo = []
+    for row in rows:
+        text = hospital_text(row[:11])
+        digest = content_hash(text, embedder.model)
+        if row[12] and row[11] == digest:
+            continue
+        todo.append((str(row[0]), text))
+
+    print(f"Embedding {len(todo)} of {len(rows)} hospitals "
+          f"({len(rows) - len(todo)} unchanged)...")
+
+    with tqdm(total=len(todo)) as bar:
+        for start in range(0, len(todo), BATCH_SIZE):
+            chunk = todo[start:start + BATCH_SIZE]
+            # a fallback embedder may answer with another model; hash what
+            # actually produced the vector so those rows get redone later
+            embeddings, model = embedder.embed_tagged([text for _, text in chunk])
+
+            batch = [
+                (hid, emb, content_hash(text, model), model, len(emb))
+                for (hid, text), emb in zip(chunk, embeddings)
+            ]
+            write_batch(cur, batch)
+
+            # commit per batch so a crash only loses the batch in flight
+            conn.commit()
+            bar.update(len(chunk))
 
-    conn.commit()
     cur.close()
     conn.close()
 
@@ -1,3 +1,4 @@
+import os
 import json
 import random
 import pandas as pd
@@ -5,10 +6,25 @@ import uuid
 from datetime import datetime
 from faker import Faker
 
-fake = Faker()
+from api.services.blood_types import BLOOD_TYPES
+
+# Enriches the raw OSM elements into hospital records.
+#
+#   ENRICH_OUTPUT=legacy   processed_hospitals.json + .csv (default)
+#   ENRICH_OUTPUT=ndjson,parquet,arrow   any mix, streamed in one pass
+#
+# The streaming outputs never hold more than one batch of records, so the
+# input can be a country-wide extract. The Arrow file can be memory-mapped
+# by downstream readers; parquet and arrow need pyarrow.
+
+# ---------------- CONFIG ----------------
 
-with open("data/raw_osm_data.json") as f:
-    raw = json.load(f)
+RAW_PATH = os.getenv("ENRICH_INPUT", "data/raw_osm_data.json")
+OUT_BASE = os.getenv("ENRICH_OUT_BASE", "data/processed_hospitals")
+OUTPUTS = [o for o in os.getenv("ENRICH_OUTPUT", "legacy").split(",") if o]
+BATCH_SIZE = int(os.getenv("ENRICH_BATCH_SIZE", "65536"))
+
+fake = Faker()
 
 def trauma_level(name):
     name = name.lower()
@@ -20,44 +36,212 @@ def trauma_level(name):
 
 blood_types = ["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"]
 
-processed = []
-
-for r in raw:
-    tags = r.get("tags", {})
-    name = tags.get("name", "Unknown Hospital")
-
-    record = {
-        "id": str(uuid.uuid4()),
-        "name": name,
-        "lat": r.get("lat"),
-        "lon": r.get("lon"),
-        "address": tags.get("addr:full", ""),
-        "city": r.get("city"),
-        "type": "blood_bank" if "blood" in name.lower() else "hospital",
-        "trauma_level": trauma_level(name),
-        "rating": round(random.uniform(3.5, 5.0), 2),
-        "avg_response_time_mins": random.randint(10, 60),
-        "icu_beds_available": random.randint(0, 10),
-        "verified_status": random.random() > 0.2,
-        "phone": fake.phone_number(),
-        "website": fake.url(),
-        "last_updated": datetime.utcnow().isoformat()
-    }
-
-    inventory = {}
-    for bt in blood_types:
-        inventory[bt] = random.randint(0, 25)
-
-    record["blood_inventory"] = inventory
-
-    processed.append(record)
-
-# Save JSON
-with open("data/processed_hospitals.json", "w") as f:
-    json.dump(processed, f, indent=2)
-
-# Save CSV
-df = pd.json_normalize(processed)
-df.to_csv("data/processed_hospitals.csv", index=False)
-
-print(f"Generated {len(processed)} enriched records.")
+# ---------------- INPUT ----------------
+
+def iter_elements(path, chunk_size=1 << 20):
+    # one element at a time from a JSON array, or from NDJSON (one per line)
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        decoder = json.JSONDecoder()
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        pos = 1
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if buf.startswith("]", pos):
+                return
+            try:
+                element, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # element runs past the buffer: keep the tail, read more
+                more = f.read(chunk_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+            yield element
+
+# ---------------- ENRICH ----------------
+
+def hospital_id(element):
+    # stable per OSM element, so reloads upsert rather than duplicate;
+    # load_hospitals.py keeps the random ids of rows loaded before this
+    if element.get("id") is None:
+        return str(uuid.uuid4())
+    url = f"https://www.openstreetmap.org/{element.get('type', 'node')}/{element['id']}"
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, url))
+
+def enrich(elements):
+    last_updated = datetime.utcnow().isoformat()
+
+    for r in elements:
+        tags = r.get("tags", {})
+        name = tags.get("name", "Unknown Hospital")
+
+        record = {
+            "id": hospital_id(r),
+            "name": name,
+            "lat": r.get("lat"),
+            "lon": r.get("lon"),
+            "address": tags.get("addr:full", ""),
+            "city": r.get("city"),
+            "type": "blood_bank" if "blood" in name.lower() else "hospital",
+            "trauma_level": trauma_level(name),
+            "rating": round(random.uniform(3.5, 5.0), 2),
+            "avg_response_time_mins": random.randint(10, 60),
+            "icu_beds_available": random.randint(0, 10),
+            "verified_status": random.random() > 0.2,
+            "phone": fake.phone_number(),
+            "website": fake.url(),
+            "last_updated": last_updated
+        }
+
+        inventory = {}
+        for bt in blood_types:
+            inventory[bt] = random.randint(0, 25)
+
+        record["blood_inventory"] = inventory
+
+        yield record
+
+# ---------------- OUTPUT ----------------
+
+class LegacySink:
+    # the original indented JSON + json_normalize CSV; holds every record
+    def __init__(self, base):
+        self.base = base
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        with open(self.base + ".json", "w") as f:
+            json.dump(self.records, f, indent=2)
+        df = pd.json_normalize(self.records)
+        df.to_csv(self.base + ".csv", index=False)
+
+
+class NDJSONSink:
+    def __init__(self, base):
+        self.f = open(base + ".ndjson", "w", encoding="utf-8")
+
+    def write(self, record):
+        self.f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.f.close()
+
+
+def hospital_schema(pa):
+    # column names match the hospitals table; blood_inventory is flattened
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("lat", pa.float32()),
+            ("lon", pa.float32()),
+            ("address", pa.string()),
+            ("city", pa.string()),
+            ("type", pa.string()),
+            ("trauma_level", pa.int8()),
+            ("rating", pa.float32()),
+            ("avg_response_time_mins", pa.int16()),
+            ("icu_beds_available", pa.int16()),
+            ("verified_status", pa.bool_()),
+            ("phone", pa.string()),
+            ("website", pa.string()),
+            ("last_updated", pa.timestamp("us")),
+        ]
+        + [(col, pa.int16()) for col in BLOOD_TYPES.values()]
+    )
+
+
+class ColumnarSink:
+    """Typed Parquet or Arrow IPC output, written `batch_size` rows at a time.
+
+    Each batch becomes one Parquet row group / Arrow record batch, so memory
+    stays flat however long the input is.
+    """
+
+    def __init__(self, base, fmt, batch_size=BATCH_SIZE):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise SystemExit(f"{fmt} output needs pyarrow (pip install pyarrow)")
+
+        self.pa = pa
+        self.schema = hospital_schema(pa)
+        self.batch_size = batch_size
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(base + ".parquet", self.schema, compression="zstd")
+        else:
+            self.writer = pa.ipc.new_file(base + ".arrow", self.schema)
+        self._reset()
+
+    def _reset(self):
+        self.columns = {name: [] for name in self.schema.names}
+        self.rows = 0
+
+    def write(self, record):
+        c = self.columns
+        for key in ("id", "name", "lat", "lon", "address", "city", "type", "trauma_level",
+                    "rating", "avg_response_time_mins", "icu_beds_available",
+                    "verified_status", "phone", "website"):
+            c[key].append(record[key])
+        c["last_updated"].append(datetime.fromisoformat(record["last_updated"]))
+        for bt, col in BLOOD_TYPES.items():
+            c[col].append(record["blood_inventory"][bt])
+
+        self.rows += 1
+        if self.rows >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        arrays = [
+            self.pa.array(self.columns[field.name], type=field.type)
+            for field in self.schema
+        ]
+        table = self.pa.Table.from_arrays(arrays, schema=self.schema)
+        self.writer.write_table(table)
+        self._reset()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_sink(kind):
+    if kind == "legacy":
+        return LegacySink(OUT_BASE)
+    if kind == "ndjson":
+        return NDJSONSink(OUT_BASE)
+    if kind in ("parquet", "arrow"):
+        return ColumnarSink(OUT_BASE, kind)
+    raise SystemExit(f"Unknown ENRICH_OUTPUT format: {kind}")
+
+# ---------------- MAIN ----------------
+
+if __name__ == "__main__":
+    sinks = [open_sink(kind) for kind in OUTPUTS]
+
+    count = 0
+    for record in enrich(iter_elements(RAW_PATH)):
+        for sink in sinks:
+            sink.write(record)
+        count += 1
+
+    for sink in sinks:
+        sink.close()
+
+    print(f"Generated {count} enriched records ({', '.join(OUTPUTS)}).")
@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# A local stand-in for the Overpass API, for exercising fetch_osm_data.py
+# offline. Any city name works and gets a deterministic set of hospitals.
+# It answers If-None-Match with 304, delays every reply by `latency`, and
+# returns 429 when more than `slots` requests are in flight, as Overpass
+# does. edit(city) changes one element, to test incremental refresh.
+#
+#   python -m scripts.fake_overpass          # serves on FAKE_OVERPASS_PORT
+#   OVERPASS_URL=http://127.0.0.1:8089/api/interpreter python -m scripts.fetch_osm_data
+
+_CITY = re.compile(r'area\["name"="([^"]+)"\]')
+
+
+class FakeOverpassHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        self.answer(form.get("data", [""])[0])
+
+    def do_GET(self):
+        query = self.path.partition("?")[2]
+        self.answer(parse_qs(query).get("data", [""])[0])
+
+    def answer(self, query):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            if server.in_flight >= server.slots:
+                server.rejected += 1
+                busy = True
+            else:
+                server.in_flight += 1
+                busy = False
+
+        if busy:
+            self.send_response(429)
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            return
+
+        try:
+            time.sleep(server.latency)
+            match = _CITY.search(query)
+            if match is None:
+                self.send_response(400)
+                self.end_headers()
+                return
+
+            body = server.payload(match.group(1))
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with server.lock:
+                    server.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class FakeOverpass(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, elements=40, latency=0.05, slots=2):
+        super().__init__((host, port), FakeOverpassHandler)
+        self.elements = elements
+        self.latency = latency
+        self.slots = slots
+
+        self.lock = threading.Lock()
+        self.revisions = {}
+        self.in_flight = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.rejected = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/interpreter"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def edit(self, city):
+        with self.lock:
+            self.revisions[city] = self.revisions.get(city, 0) + 1
+
+    def payload(self, city):
+        rng = random.Random(city)
+        lat, lon = rng.uniform(9, 31), rng.uniform(70, 90)
+
+        elements = []
+        for i in range(self.elements):
+            osm_id = int(hashlib.sha1(f"{city}/{i}".encode()).hexdigest()[:10], 16)
+            blood_bank = i % 10 == 0
+            tags = {"name": f"{city} {'Blood Bank' if blood_bank else 'Hospital'} {i}"}
+            tags["healthcare" if blood_bank else "amenity"] = "blood_bank" if blood_bank else "hospital"
+            elements.append({
+                "type": "node",
+                "id": osm_id,
+                "lat": round(lat + rng.uniform(-0.2, 0.2), 7),
+                "lon": round(lon + rng.uniform(-0.2, 0.2), 7),
+                "tags": tags,
+            })
+
+        # each edit renames one element
+        for rev in range(1, self.revisions.get(city, 0) + 1):
+            if elements:
+                elements[rev % len(elements)]["tags"]["name"] += f" (rev {rev})"
+
+        return json.dumps({
+            "version": 0.6,
+            "generator": "fake_overpass",
+            "osm3s": {"timestamp_osm_base": "2026-01-01T00:00:00Z"},
+            "elements": elements,
+        }).encode()
+
+
+if __name__ == "__main__":
+    server = FakeOverpass(port=int(os.getenv("FAKE_OVERPASS_PORT", "8089")))
+    print(f"Fake Overpass on {server.url}")
+    server.serve_forever()
@@ -1,13 +1,60 @@
-import requests
+import os
+import re
 import json
 import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from api.services.rate_limit import TokenBucket
+from scripts.enrich_data import iter_elements
 
-CITIES = [
+# Fetches hospitals and blood banks per city from Overpass, concurrently but
+# under one global request rate. Each city's response is cached on disk;
+# within OSM_CACHE_TTL_HOURS it is reused as is, after that it is revalidated
+# (If-None-Match / If-Modified-Since) before being downloaded again.
+#
+# Writes the full snapshot to data/raw_osm_data.json as before, plus only the
+# new or changed elements to data/raw_osm_changes.ndjson. Those are raw
+# Overpass elements, so enrich them before loading:
+#
+#   ENRICH_INPUT=data/raw_osm_changes.ndjson ENRICH_OUT_BASE=data/processed_changes \
+#       ENRICH_OUTPUT=ndjson python -m scripts.enrich_data
+#   LOAD_INPUT=data/processed_changes.ndjson python -m scripts.load_hospitals
+
+# ---------------- CONFIG ----------------
+
+DEFAULT_CITIES = [
     "Delhi", "Mumbai", "Bangalore", "Chennai",
     "Kolkata", "Hyderabad", "Pune", "Ahmedabad"
 ]
 
-OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+CITIES = [c for c in os.getenv("OSM_CITIES", ",".join(DEFAULT_CITIES)).split(",") if c]
+
+OVERPASS_URL = os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+
+# requests per second across every worker; the public instance allows a
+# couple of slots per client and each query holds one for seconds, so one
+# request every 5 s stays clear of 429s. That makes every request-bound run
+# (cold, or revalidating after the TTL) take at least (cities - 1) / OSM_RATE
+# seconds, about 285 s for 58 cities, the same as the old loop's sleeps; the
+# savings are the requests skipped within the TTL and the 304s after it. Raise
+# OSM_RATE only against a private Overpass instance.
+RATE = float(os.getenv("OSM_RATE", "0.2"))
+WORKERS = int(os.getenv("OSM_WORKERS", "4"))
+MAX_ATTEMPTS = int(os.getenv("OSM_MAX_ATTEMPTS", "5"))
+
+CACHE_DIR = os.getenv("OSM_CACHE_DIR", "data/osm_cache")
+CACHE_TTL = float(os.getenv("OSM_CACHE_TTL_HOURS", "24")) * 3600
+
+OUTPUT = "data/raw_osm_data.json"
+CHANGES = "data/raw_osm_changes.ndjson"
+REMOVED = "data/raw_osm_removed.json"
+
+# Overpass answers 429 when out of slots and 504 when overloaded
+RETRY_STATUSES = {429, 502, 503, 504}
 
 def build_query(city):
     return f"""
@@ -20,24 +67,213 @@ def build_query(city):
     out tags center;
     """
 
-all_results = []
+# ---------------- FETCH ----------------
+
+class OverpassFetcher:
+    """Concurrent, rate-limited, cached Overpass client.
+
+    All workers share one token bucket, so adding workers overlaps the
+    network waits without raising the request rate the server sees.
+    """
+
+    def __init__(self, url=OVERPASS_URL, cache_dir=CACHE_DIR, rate=RATE, workers=WORKERS,
+                 ttl=CACHE_TTL, max_attempts=MAX_ATTEMPTS, timeout=60):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst=1)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counts = {"cached": 0, "not_modified": 0, "downloaded": 0, "retries": 0, "stale": 0}
+
+    def fetch_all(self, cities):
+        # {city: elements}, in the order given
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(cities, pool.map(self.fetch, cities)))
+
+    def fetch(self, city):
+        query = build_query(city)
+        query_hash = hashlib.sha256(query.encode()).hexdigest()[:16]
+
+        entry = self._load(city)
+        if entry is not None and entry.get("query") != query_hash:
+            entry = None
+
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            self._count("cached")
+            return entry["elements"]
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            r = self._post(query, headers)
+        except requests.RequestException:
+            if entry is None:
+                raise
+            # a stale snapshot beats failing the whole refresh
+            self._count("stale")
+            print(f"{city}: Overpass unavailable, using cached response")
+            return entry["elements"]
+
+        if r.status_code == 304 and entry is None:
+            # nothing of ours to revalidate (a proxy answered): treat as a miss
+            r = self._post(query, {"Cache-Control": "no-cache"})
+            if r.status_code == 304:
+                raise requests.HTTPError(f"{city}: 304 Not Modified with no cached copy", response=r)
+
+        if r.status_code == 304:
+            self._count("not_modified")
+            entry["fetched_at"] = time.time()
+            self._save(city, entry)
+            return entry["elements"]
+
+        self._count("downloaded")
+        data = r.json()
+        entry = {
+            "query": query_hash,
+            "fetched_at": time.time(),
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "osm_base": data.get("osm3s", {}).get("timestamp_osm_base"),
+            "elements": data.get("elements", []),
+        }
+        self._save(city, entry)
+        return entry["elements"]
+
+    def _post(self, query, headers):
+        for attempt in range(1, self.max_attempts + 1):
+            self.bucket.acquire()
+            try:
+                r = self._session().post(
+                    self.url, data={"data": query}, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_attempts:
+                    raise
+                r = None
+
+            if r is not None and r.status_code not in RETRY_STATUSES:
+                if r.status_code != 304:
+                    r.raise_for_status()
+                return r
+            if attempt == self.max_attempts:
+                r.raise_for_status()
+
+            self._count("retries")
+            time.sleep(self._retry_delay(r, attempt))
+
+    def _retry_delay(self, r, attempt):
+        retry_after = r.headers.get("Retry-After") if r is not None else None
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        delay = min(60, 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _session(self):
+        # requests.Session is not thread-safe; one per worker
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    # ---------------- CACHE ----------------
+    def _path(self, city):
+        slug = re.sub(r"[^0-9a-z]+", "_", city.lower()).strip("_")
+        return os.path.join(self.cache_dir, f"{slug}.json")
+
+    def _load(self, city):
+        try:
+            with open(self._path(city), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, city, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(city)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+# ---------------- DIFF ----------------
+
+def snapshot(results):
+    # {city: elements} -> one list, each element tagged with its city
+    all_results = []
+    for city, elements in results.items():
+        for el in elements:
+            el["city"] = city
+            all_results.append(el)
+    return all_results
+
+def element_key(el):
+    return f"{el.get('city')}/{el.get('type')}/{el.get('id')}"
+
+def fingerprint(el):
+    return hashlib.sha1(json.dumps(el, sort_keys=True).encode()).hexdigest()
+
+def diff(previous_path, elements):
+    # (new, changed, removed keys) against the last snapshot, streamed from disk
+    before = {}
+    if os.path.exists(previous_path):
+        for el in iter_elements(previous_path):
+            before[element_key(el)] = fingerprint(el)
+
+    new, changed, seen = [], [], set()
+    for el in elements:
+        key = element_key(el)
+        seen.add(key)
+        old = before.get(key)
+        if old is None:
+            new.append(el)
+        elif old != fingerprint(el):
+            changed.append(el)
+
+    removed = [key for key in before if key not in seen]
+    return new, changed, removed
+
+# ---------------- MAIN ----------------
+
+def main():
+    fetcher = OverpassFetcher()
 
-for city in CITIES:
-    print(f"Fetching {city}...")
+    start = time.perf_counter()
+    results = fetcher.fetch_all(CITIES)
+    elapsed = time.perf_counter() - start
 
-    query = build_query(city)
-    response = requests.post(OVERPASS_URL, data={"data": query})
-    response.raise_for_status()
+    all_results = snapshot(results)
+    new, changed, removed = diff(OUTPUT, all_results)
 
-    data = response.json()
+    with open(OUTPUT, "w", encoding="utf-8") as f:
+        json.dump(all_results, f, indent=2)
 
-    for el in data.get("elements", []):
-        el["city"] = city
-        all_results.append(el)
+    with open(CHANGES, "w", encoding="utf-8") as f:
+        for el in new + changed:
+            f.write(json.dumps(el) + "\n")
 
-    time.sleep(5)  # rate limiting
+    with open(REMOVED, "w", encoding="utf-8") as f:
+        json.dump(removed, f)
 
-with open("data/raw_osm_data.json", "w", encoding="utf-8") as f:
-    json.dump(all_results, f, indent=2)
+    c = fetcher.counts
+    print(f"{len(CITIES)} cities in {elapsed:.1f}s: {c['downloaded']} downloaded, "
+          f"{c['not_modified']} not modified, {c['cached']} from cache, {c['stale']} stale, "
+          f"{c['retries']} retries")
+    print(f"Saved {len(all_results)} locations to {OUTPUT}")
+    print(f"{len(new)} new, {len(changed)} changed -> {CHANGES}; {len(removed)} removed -> {REMOVED}")
 
-print(f"Saved {len(all_results)} locations to data/raw_osm_data.json")
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,14 @@
 import os
 import psycopg2
-import requests
 from dotenv import load_dotenv
 
+from api.services.embedders import embedder_from_env
+from api.services.spatial_index import SpatialIndex
+from api.services.ranking_engine import hybrid_score_sql
+
 load_dotenv()
 
 # ---------- ENV CONFIG ----------
-OLLAMA_URL = os.getenv("OLLAMA_URL")
-MODEL = os.getenv("OLLAMA_MODEL")
 
 DB = {
     "dbname": os.getenv("DB_NAME"),
@@ -18,67 +19,64 @@ DB = {
 }
 
 # ---------- EMBEDDING FUNCTION ----------
+embedder = embedder_from_env()
+
 def embed(text):
-    r = requests.post(
-        OLLAMA_URL,
-        json={"model": MODEL, "prompt": text},
-        timeout=60
-    )
-    r.raise_for_status()
-    return r.json()["embedding"]
+    return embedder.embed(text)
+
+
+# ---------- SPATIAL INDEX ----------
+_index = None
+
+def spatial_index():
+    global _index
+    if _index is None:
+        conn = psycopg2.connect(**DB)
+        _index = SpatialIndex.from_db(conn)
+        conn.close()
+    return _index
 
 
 # ---------- HYBRID SEARCH FUNCTION ----------
-def hybrid_search(city, blood_col, user_query, user_lat, user_lon, limit=5):
+def hybrid_search(city, blood_col, user_query, user_lat, user_lon, limit=5,
+                  query_embedding=None):
+    # Distance in KM is computed once, in memory, for the city's hospitals
+    ids, dists = spatial_index().distances(user_lat, user_lon, city)
+    if not ids:
+        return []
+
     conn = psycopg2.connect(**DB)
     cur = conn.cursor()
 
-    query_embedding = embed(user_query)
+    if query_embedding is None:
+        query_embedding = embed(user_query)
 
     sql = f"""
     SELECT
-        name,
-        rating,
-        avg_response_time_mins,
-        icu_beds_available,
-        {blood_col},
-
-        -- Distance in KM
-        6371 * acos(
-            cos(radians(%s)) * cos(radians(lat)) *
-            cos(radians(lon) - radians(%s)) +
-            sin(radians(%s)) * sin(radians(lat))
-        ) AS distance_km
-
-    FROM hospitals
-    WHERE city = %s
-      AND {blood_col} > 0
+        h.name,
+        h.rating,
+        h.avg_response_time_mins,
+        h.icu_beds_available,
+        h.{blood_col},
+        c.distance_km
+
+    FROM hospitals h
+    JOIN unnest(%s::text[], %s::float8[]) AS c(id, distance_km)
+      ON h.id::text = c.id
+    WHERE h.{blood_col} > 0
 
     ORDER BY
-        -- Hybrid weighted ranking
-        (embedding <-> %s::vector) * 0.5 +
-        (
-            6371 * acos(
-                cos(radians(%s)) * cos(radians(lat)) *
-                cos(radians(lon) - radians(%s)) +
-                sin(radians(%s)) * sin(radians(lat))
-            )
-        ) * 0.3 +
-        (avg_response_time_mins / 60.0) * 0.1 +
-        (1.0 / rating) * 0.1
+        -- Hybrid weighted ranking, shared with the API
+        {hybrid_score_sql("%s::vector", "c.distance_km")},
+        c.distance_km
 
     LIMIT %s;
     """
 
     cur.execute(sql, (
-        user_lat,      # distance calc
-        user_lon,
-        user_lat,
-        city,
+        ids,           # candidate hospitals from the index
+        dists.tolist(),
         query_embedding,
-        user_lat,      # distance in ORDER BY
-        user_lon,
-        user_lat,
         limit
     ))
 
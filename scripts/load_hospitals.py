@@ -0,0 +1,214 @@
+import os
+import io
+import csv
+import time
+import psycopg2
+from dotenv import load_dotenv
+
+from api.migrations import migrate
+from api.services.blood_types import BLOOD_TYPES, BLOOD_COLUMNS
+from scripts.enrich_data import iter_elements
+
+load_dotenv()
+
+# Loads enriched hospitals (CSV, JSON array or NDJSON) into the hospitals
+# table: COPY into a temporary staging table, then one upsert by id.
+# Rows whose content is unchanged are skipped, so a nightly refresh of an
+# unchanged catalog writes no new row versions.
+
+DB = {
+    "dbname": os.getenv("DB_NAME"),
+    "user": os.getenv("DB_USER"),
+    "password": os.getenv("DB_PASSWORD"),
+    "host": os.getenv("DB_HOST"),
+    "port": int(os.getenv("DB_PORT")),
+}
+
+INPUT = os.getenv("LOAD_INPUT", "data/processed_hospitals_clean.csv")
+
+COLUMNS = [
+    "id", "name", "lat", "lon", "address", "city", "type", "trauma_level",
+    "rating", "avg_response_time_mins", "icu_beds_available", "verified_status",
+    "phone", "website", "last_updated",
+] + BLOOD_COLUMNS
+
+# stamped on every enrichment run, so it is written but never counts as a change
+_NOT_COMPARED = {"id", "last_updated"}
+
+# ---------------- INPUT ----------------
+
+def column_for(field, path):
+    # CSV headers come from pd.json_normalize: blood_inventory.O+ -> blood_o_pos
+    if field.startswith("blood_inventory."):
+        field = BLOOD_TYPES.get(field.split(".", 1)[1], field)
+    if field not in COLUMNS:
+        raise SystemExit(f"Unknown hospital column in {path}: {field}")
+    return field
+
+
+def flatten(record, path):
+    row = dict(record)
+    inventory = row.pop("blood_inventory", None) or {}
+    for bt, units in inventory.items():
+        row[f"blood_inventory.{bt}"] = units
+    return {column_for(k, path): v for k, v in row.items()}
+
+
+class LineReader:
+    """File-like view over an iterator of text lines, for copy_expert()."""
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._pending = ""
+
+    def read(self, size=-1):
+        chunks, n = [self._pending], len(self._pending)
+        for line in self._lines:
+            chunks.append(line)
+            n += len(line)
+            if 0 <= size <= n:
+                break
+        data = "".join(chunks)
+        if size < 0:
+            size = len(data)
+        self._pending = data[size:]
+        return data[:size]
+
+
+def csv_lines(records, path):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    for record in records:
+        row = flatten(record, path)
+        writer.writerow(["" if row.get(c) is None else row.get(c) for c in COLUMNS])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+
+
+def open_source(path):
+    # (columns in file order, file-like CSV with a header row)
+    if path.endswith(".csv"):
+        f = open(path, encoding="utf-8", newline="")
+        header = next(csv.reader([f.readline()]))
+        f.seek(0)
+        return [column_for(h, path) for h in header], f
+
+    lines = csv_lines(iter_elements(path), path)
+    return COLUMNS, LineReader(_with_header(COLUMNS, lines))
+
+
+def _with_header(columns, lines):
+    yield ",".join(columns) + "\n"
+    yield from lines
+
+# ---------------- LOAD ----------------
+
+def table_columns(cur):
+    # {column: SQL type}; older hand-made tables may lack some columns
+    cur.execute("""
+        SELECT attname, format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = 'hospitals'::regclass AND attnum > 0 AND NOT attisdropped;
+    """)
+    return dict(cur.fetchall())
+
+
+def upsert_sql(columns, newest_first):
+    cols = ", ".join(columns)
+    updates = ",\n            ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "id")
+    compared = [c for c in columns if c not in _NOT_COMPARED]
+    order = "id, last_updated DESC NULLS LAST" if newest_first else "id"
+    return f"""
+    WITH up AS (
+        INSERT INTO hospitals ({cols})
+        SELECT DISTINCT ON (id) {cols}
+        FROM hospitals_staging
+        WHERE id IS NOT NULL
+        ORDER BY {order}
+        ON CONFLICT (id) DO UPDATE SET
+            {updates}
+        WHERE ({", ".join(f"hospitals.{c}" for c in compared)})
+              IS DISTINCT FROM ({", ".join(f"EXCLUDED.{c}" for c in compared)})
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+    FROM up;
+    """
+
+
+# Hospitals enriched before ids were derived from OSM element ids carry
+# random uuid4s. A staged row whose id is new but which matches such a
+# hospital on (name, lat, lon) takes over the existing id, so re-enriched
+# data updates those rows (and their feedback / inventory) instead of
+# inserting a duplicate next to each.
+ADOPT_IDS_SQL = """
+UPDATE hospitals_staging s
+SET id = h.id
+FROM hospitals h
+WHERE s.name = h.name AND s.lat = h.lat AND s.lon = h.lon
+  AND NOT EXISTS (SELECT 1 FROM hospitals x WHERE x.id = s.id);
+"""
+
+
+def load(conn, path):
+    columns, source = open_source(path)
+    if "id" not in columns or "name" not in columns:
+        raise SystemExit(f"{path} needs at least id and name columns")
+
+    cur = conn.cursor()
+    try:
+        types = table_columns(cur)
+        target = [c for c in columns if c in types]
+        skipped = [c for c in columns if c not in types]
+
+        # typed like hospitals, so COPY does the casting; temp tables skip WAL
+        staging = ", ".join(f"{c} {types.get(c, 'TEXT')}" for c in columns)
+        cur.execute(f"CREATE TEMP TABLE hospitals_staging ({staging}) ON COMMIT DROP;")
+        cur.copy_expert(
+            f"COPY hospitals_staging ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv, HEADER true)",
+            source,
+        )
+        adopted = 0
+        if {"lat", "lon"} <= set(target):
+            cur.execute(ADOPT_IDS_SQL)
+            adopted = cur.rowcount
+        cur.execute("SELECT count(DISTINCT id) FROM hospitals_staging;")
+        staged = cur.fetchone()[0]
+
+        cur.execute(upsert_sql(target, "last_updated" in columns))
+        inserted, updated = cur.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        if hasattr(source, "close"):
+            source.close()
+
+    return {"staged": staged, "inserted": inserted, "updated": updated, "adopted": adopted,
+            "skipped": skipped}
+
+# ---------------- MAIN ----------------
+
+def main():
+    conn = psycopg2.connect(**DB)
+    migrate(conn)
+
+    start = time.perf_counter()
+    counts = load(conn, INPUT)
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    unchanged = counts["staged"] - counts["inserted"] - counts["updated"]
+    print(f"{INPUT}: {counts['staged']} hospitals staged, {counts['inserted']} inserted, "
+          f"{counts['updated']} updated, {unchanged} unchanged ({elapsed:.2f}s)")
+    if counts["adopted"]:
+        print(f"{counts['adopted']} rows matched existing hospitals by name and position, kept their ids")
+    if counts["skipped"]:
+        print(f"Columns not in hospitals, ignored: {', '.join(counts['skipped'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import math
+
+from api.services.blood_types import BLOOD_COLUMNS
+from api.services.ranking_engine import hybrid_score_sql
+
+# The retrieval systems compared by evaluate_ranking.py, evaluate_systems.py
+# and benchmark_retrieval.py, plus the relevance metrics they share.
+# Every system returns rows shaped (name, rating, icu, blood, distance_km).
+
+K = 5
+
+# approximate centre of each city in data/processed_hospitals.json
+CITY_CENTRES = {
+    "Delhi": (28.6139, 77.2090),
+    "Mumbai": (19.0760, 72.8777),
+    "Hyderabad": (17.3850, 78.4867),
+    "Pune": (18.5204, 73.8567),
+    "Ahmedabad": (23.0225, 72.5714),
+    "Chennai": (13.0827, 80.2707),
+    "Kolkata": (22.5726, 88.3639),
+}
+
+# a hospital counts as relevant for Precision@5 at this graded score (max 7)
+RELEVANT_SCORE = 4
+
+_DISTANCE = """
+    6371*acos(
+        cos(radians(%s))*cos(radians(lat))*cos(radians(lon)-radians(%s))+
+        sin(radians(%s))*sin(radians(lat))
+    )"""
+
+# ---------------- SYSTEMS ----------------
+
+def _check(blood_col):
+    if blood_col not in BLOOD_COLUMNS:
+        raise ValueError(f"Unknown blood column: {blood_col}")
+
+def sql_only(cur, q_emb, city, lat, lon, blood_col="blood_o_pos", k=K):
+    # global, no city; fastest response time first
+    _check(blood_col)
+    cur.execute(f"""
+    SELECT name,rating,icu_beds_available,{blood_col},{_DISTANCE}
+    FROM hospitals
+    WHERE {blood_col} > 0
+    ORDER BY avg_response_time_mins ASC
+    LIMIT %s;
+    """, (lat, lon, lat, k))
+    return cur.fetchall()
+
+def vector_only(cur, q_emb, city, lat, lon, blood_col="blood_o_pos", k=K):
+    # global nearest embeddings, no filters
+    _check(blood_col)
+    cur.execute(f"""
+    SELECT name,rating,icu_beds_available,{blood_col},{_DISTANCE}
+    FROM hospitals
+    ORDER BY embedding <-> %s::vector
+    LIMIT %s;
+    """, (lat, lon, lat, q_emb, k))
+    return cur.fetchall()
+
+def hybrid(cur, q_emb, city, lat, lon, blood_col="blood_o_pos", k=K):
+    # city + vector + distance + ops, the API's hybrid score
+    _check(blood_col)
+    cur.execute(f"""
+    SELECT name,rating,icu_beds_available,{blood_col},{_DISTANCE}
+    FROM hospitals h
+    WHERE city=%s AND {blood_col}>0
+    ORDER BY
+        {hybrid_score_sql("%s::vector", f"({_DISTANCE})")}
+    LIMIT %s;
+    """, (
+        lat, lon, lat,
+        city,
+        q_emb,
+        lat, lon, lat,
+        k
+    ))
+    return cur.fetchall()
+
+SYSTEMS = {"SQL": sql_only, "Vector": vector_only, "Hybrid": hybrid}
+
+# ---------------- METRICS ----------------
+
+def relevance(row):
+    # row = name, rating, icu, blood, distance
+    score = 0
+
+    # Distance (strong weight)
+    if row[4] < 5:
+        score += 3
+    elif row[4] < 15:
+        score += 1
+
+    # Blood
+    if row[3] >= 10:
+        score += 2
+    elif row[3] > 0:
+        score += 1
+
+    # ICU
+    if row[2] >= 5:
+        score += 2
+    elif row[2] > 0:
+        score += 1
+
+    return score
+
+def ndcg(scores):
+    dcg = sum((2**s - 1) / math.log2(i + 2) for i, s in enumerate(scores))
+    ideal = sorted(scores, reverse=True)
+    idcg = sum((2**s - 1) / math.log2(i + 2) for i, s in enumerate(ideal))
+    return dcg / idcg if idcg > 0 else 0
+
+def score_runs(runs, k=K):
+    # mean quality over a list of result lists
+    mrrs, ndcgs, precisions, distances = [], [], [], []
+
+    for rows in runs:
+        rel = [relevance(r) for r in rows]
+
+        first = [i+1 for i,s in enumerate(rel) if s > 0]
+        mrrs.append(1/first[0] if first else 0)
+
+        ndcgs.append(ndcg(rel))
+        precisions.append(sum(s >= RELEVANT_SCORE for s in rel) / k)
+        if rows:
+            distances.append(sum(r[4] for r in rows) / len(rows))
+
+    return {
+        "MRR": sum(mrrs)/len(mrrs),
+        "NDCG@5": sum(ndcgs)/len(ndcgs),
+        "Precision@5": sum(precisions)/len(precisions),
+        "AvgDistance": sum(distances)/len(distances) if distances else None,
+    }